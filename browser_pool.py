@@ -0,0 +1,149 @@
+import threading
+from contextlib import contextmanager
+from playwright.sync_api import sync_playwright
+
+
+class BrowserPool:
+    """Keeps one Chromium alive for the worker and hands out reusable browser contexts.
+
+    Playwright's sync API is bound to the thread that started it, so a pool
+    must only be used from the thread that created it.
+    """
+
+    def __init__(self, user_agent, max_contexts=4, launch_args=None, viewport=None):
+        self.user_agent = user_agent
+        self.viewport = viewport
+        self.max_contexts = max_contexts
+        self.launch_args = launch_args or ["--disable-blink-features=AutomationControlled"]
+        self.launches = 0
+        self._playwright = None
+        self._browser = None
+        self._idle_contexts = []
+
+    # --- LIFECYCLE ---
+    def _launch(self):
+        self.close()
+        print("🌐 [BROWSER] Launching Chromium...")
+        self._playwright = sync_playwright().start()
+        self._browser = self._playwright.chromium.launch(headless=True, args=self.launch_args)
+        self.launches += 1
+
+    def is_healthy(self):
+        """Cheap check used on every context release: is the browser still connected?"""
+        return self._browser is not None and self._browser.is_connected()
+
+    def probe(self):
+        """Round-trips to the browser process by opening and closing a throwaway context.
+
+        Catches a Chromium that is still connected but failing protocol calls. Playwright's sync
+        API has no timeout for this, so a browser that stops answering entirely blocks the caller
+        (and its command lease eventually expires) rather than being detected here.
+        """
+        if not self.is_healthy():
+            return False
+        try:
+            self._browser.new_context().close()
+            return True
+        except Exception:
+            return False
+
+    def ensure_browser(self):
+        if not self.is_healthy():
+            if self._browser is not None:
+                print("♻️ [BROWSER] Chromium is down. Relaunching...")
+            self._launch()
+        return self._browser
+
+    def health_check(self):
+        """Relaunches a browser that died between commands. Does nothing before the first launch."""
+        if self._browser is not None and not self.probe():
+            print("♻️ [BROWSER] Chromium failed its health check. Relaunching...")
+            self._launch()
+
+    def close(self):
+        for context in self._idle_contexts:
+            try: context.close()
+            except Exception: pass
+        self._idle_contexts = []
+
+        if self._browser is not None:
+            try: self._browser.close()
+            except Exception: pass
+            self._browser = None
+
+        if self._playwright is not None:
+            try: self._playwright.stop()
+            except Exception: pass
+            self._playwright = None
+
+    # --- CHECKOUT ---
+    @contextmanager
+    def context(self):
+        """Yields a browser context, reusing an idle one when available."""
+        browser = self.ensure_browser()
+        if self._idle_contexts:
+            context = self._idle_contexts.pop()
+        else:
+            context = browser.new_context(user_agent=self.user_agent, viewport=self.viewport)
+
+        try:
+            yield context
+        finally:
+            self._release(context)
+
+    @contextmanager
+    def page(self):
+        with self.context() as context:
+            yield context.new_page()
+
+    def _release(self, context):
+        reusable = self.is_healthy() and len(self._idle_contexts) < self.max_contexts
+        try:
+            # Leave the context clean for the next command
+            for page in list(context.pages):
+                page.close()
+            if reusable:
+                context.clear_cookies()
+        except Exception:
+            reusable = False
+
+        if reusable:
+            self._idle_contexts.append(context)
+        else:
+            try: context.close()
+            except Exception: pass
+
+
+class ThreadBrowserPools:
+    """BrowserPool interface backed by one BrowserPool per thread.
+
+    Lets worker threads share a PageFetcher while each drives its own Chromium.
+    close() only closes the calling thread's browser.
+    """
+
+    def __init__(self, *args, **kwargs):
+        self._args = args
+        self._kwargs = kwargs
+        self._local = threading.local()
+
+    @property
+    def current(self):
+        pool = getattr(self._local, "pool", None)
+        if pool is None:
+            pool = self._local.pool = BrowserPool(*self._args, **self._kwargs)
+        return pool
+
+    def context(self):
+        return self.current.context()
+
+    def page(self):
+        return self.current.page()
+
+    def health_check(self):
+        self.current.health_check()
+
+    def close(self):
+        pool = getattr(self._local, "pool", None)
+        if pool is not None:
+            pool.close()
+            self._local.pool = None
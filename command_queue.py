@@ -0,0 +1,193 @@
+import os
+import socket
+import threading
+import time
+from contextlib import contextmanager
+import pymongo
+from pymongo.errors import PyMongoError
+
+# Higher runs first. Live scores are what people are watching, so they jump the queue.
+COMMAND_PRIORITIES = {
+    "sync_live": 30,
+    "sync_projection": 20,
+    "sync_archive": 10,
+    "sync_archive_backfill": 5,
+    "sync_national": 0,
+}
+
+# How long a claimed command is held before another worker may take it over
+LEASE_SECONDS = 300
+
+
+def enqueue_command(collection, action, **fields):
+    """Queues a worker command in system_state."""
+    return collection.insert_one({
+        "type": "scraper_command",
+        "action": action,
+        "priority": COMMAND_PRIORITIES.get(action, 0),
+        "status": "queued",
+        "attempts": 0,
+        "queued_at": time.time(),
+        **fields
+    })
+
+
+class CommandQueue:
+    """MongoDB job queue for dashboard commands (system_state docs with type "scraper_command").
+
+    Workers claim jobs atomically, highest priority first, and hold a lease while they run.
+    Pass `actions` to only claim (and only be woken by) those commands.
+    A job whose worker dies is handed out again once its lease expires, up to max_attempts.
+
+    Watches the collection with a change stream so an inserted command wakes the worker right
+    away. Change streams need a replica set (a single node started with `--replSet rs0` and
+    `rs.initiate()` is enough); on a standalone server, or if the stream dies, it polls instead
+    and retries the stream later.
+    """
+
+    def __init__(self, collection, actions=None, name=None, poll_interval=2, stream_retry=60, lease_seconds=LEASE_SECONDS, max_attempts=3):
+        self.collection = collection
+        self.actions = list(actions) if actions else None
+        self.poll_interval = poll_interval
+        self.stream_retry = stream_retry
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        self.worker_id = f"{socket.gethostname()}:{os.getpid()}" + (f"/{name}" if name else "")
+        self.mode = "poll"
+        self._stream = None
+        self._next_stream_attempt = 0
+        self.collection.create_index(
+            [("type", pymongo.ASCENDING), ("status", pymongo.ASCENDING),
+             ("priority", pymongo.DESCENDING), ("_id", pymongo.ASCENDING)]
+        )
+
+    # --- CHANGE STREAM ---
+    def _open_stream(self):
+        if self._stream is not None or time.time() < self._next_stream_attempt:
+            return self._stream
+
+        match = {"operationType": "insert", "fullDocument.type": "scraper_command"}
+        if self.actions:
+            match["fullDocument.action"] = {"$in": self.actions}
+        pipeline = [{"$match": match}]
+        try:
+            self._stream = self.collection.watch(pipeline)
+            if self.mode != "stream":
+                print("📡 [QUEUE] Change stream open. Commands are delivered instantly.")
+            self.mode = "stream"
+        except PyMongoError as e:
+            self._stream = None
+            self._next_stream_attempt = time.time() + self.stream_retry
+            if self.mode != "poll":
+                print(f"⚠️ [QUEUE] Change stream unavailable, polling every {self.poll_interval}s: {e}")
+            self.mode = "poll"
+        return self._stream
+
+    def _drop_stream(self, error):
+        print(f"⚠️ [QUEUE] Change stream lost, falling back to polling: {error}")
+        try: self._stream.close()
+        except Exception: pass
+        self._stream = None
+        self.mode = "poll"
+        self._next_stream_attempt = time.time() + self.stream_retry
+
+    def _wait_for_insert(self, deadline):
+        """Blocks until a command insert shows up on the stream or the deadline passes."""
+        while time.time() < deadline:
+            try:
+                if self._stream.try_next() is not None:
+                    return
+            except PyMongoError as e:
+                self._drop_stream(e)
+                return
+
+    # --- CLAIMING ---
+    def claim(self):
+        """Atomically takes the highest-priority runnable command, or returns None."""
+        now = time.time()
+        self._reap(now)
+        query = {
+            "type": "scraper_command",
+            "$or": [
+                # Missing status covers commands queued before leases existed
+                {"status": {"$in": [None, "queued"]}},
+                {"status": "running", "lease_until": {"$lt": now}, "attempts": {"$lt": self.max_attempts}},
+            ],
+        }
+        if self.actions:
+            query["action"] = {"$in": self.actions}
+        return self.collection.find_one_and_update(
+            query,
+            {
+                "$set": {"status": "running", "worker": self.worker_id, "lease_until": now + self.lease_seconds},
+                "$inc": {"attempts": 1},
+            },
+            sort=[("priority", pymongo.DESCENDING), ("_id", pymongo.ASCENDING)],
+            return_document=pymongo.ReturnDocument.AFTER,
+        )
+
+    def _reap(self, now):
+        # Jobs that keep killing their worker stop being re-delivered
+        self.collection.update_many(
+            {"type": "scraper_command", "status": "running",
+             "lease_until": {"$lt": now}, "attempts": {"$gte": self.max_attempts}},
+            {"$set": {"status": "failed", "error": "Lease expired on final attempt"}}
+        )
+
+    def wait(self, timeout):
+        """Claims the next command, waiting up to `timeout` seconds for one to arrive."""
+        deadline = time.time() + timeout
+        while True:
+            # The stream is opened before looking, so an insert landing in between still wakes us
+            stream = self._open_stream()
+            command = self.claim()
+            if command or time.time() >= deadline:
+                return command
+
+            if stream is not None:
+                self._wait_for_insert(deadline)
+            else:
+                time.sleep(max(0, min(self.poll_interval, deadline - time.time())))
+
+    # --- LEASES ---
+    @contextmanager
+    def leased(self, command):
+        """Keeps renewing the command's lease while the block runs."""
+        stop = threading.Event()
+
+        def renew():
+            while not stop.wait(self.lease_seconds / 3):
+                try:
+                    self.collection.update_one(
+                        {"_id": command["_id"], "worker": self.worker_id},
+                        {"$set": {"lease_until": time.time() + self.lease_seconds}}
+                    )
+                except PyMongoError as e:
+                    print(f"⚠️ [QUEUE] Could not renew lease for {command.get('action')}: {e}")
+
+        renewer = threading.Thread(target=renew, daemon=True)
+        renewer.start()
+        try:
+            yield command
+        finally:
+            stop.set()
+            renewer.join()
+
+    def done(self, command):
+        self.collection.delete_one({"_id": command["_id"], "worker": self.worker_id})
+
+    def fail(self, command, error):
+        """Puts a failed command back in the queue, or marks it failed once it's out of attempts."""
+        retry = command.get("attempts", 1) < self.max_attempts
+        self.collection.update_one(
+            {"_id": command["_id"], "worker": self.worker_id},
+            {"$set": {"status": "queued" if retry else "failed", "error": str(error)},
+             "$unset": {"worker": "", "lease_until": ""}}
+        )
+        return retry
+
+    def close(self):
+        if self._stream is not None:
+            try: self._stream.close()
+            except Exception: pass
+            self._stream = None
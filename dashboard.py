@@ -1,11 +1,14 @@
 import os
 import subprocess
+import time
 import streamlit as st
 import pandas as pd
 import pymongo
 from streamlit_autorefresh import st_autorefresh
 from streamlit_cookies_controller import CookieController
-import time
+from command_queue import enqueue_command, LEASE_SECONDS
+from data_version import read_data_version
+from advancement import calculate_advancement
 
 
 
@@ -67,29 +70,25 @@ EVENT_LUT = {
 }
 
 # --- Load National Data ---
-def load_national_data():
-    items = list(db["wgi_analytics"].find({}, {"_id": 0}))
-    if not items: return pd.DataFrame()
-    df = pd.DataFrame(items)
-    df.columns = [str(c).title() for c in df.columns]
-    
-    # Safety net: If 'Score' exists but 'Show' doesn't, it means seed_db hasn't run yet
-    if 'Show' not in df.columns:
-        df['Show'] = "Legacy Database Format"
-    return df
+# {class: [shows]} from the seeder's class_index. One copy shared by every session,
+# reloaded only when the seeder bumps the data version.
+@st.cache_resource(max_entries=2, show_spinner=False)
+def load_class_index(version):
+    return {doc["Class"]: sorted(doc.get("shows", [])) for doc in db["class_index"].find({}, {"_id": 0})}
 
-# --- Helper to aggregate the flat data ---
-def get_aggregated_national_data(raw_df):
-    if raw_df.empty: return raw_df
-    # Group by Guard and Class to mathematically find their high and average
-    agg_df = raw_df.groupby(['Guard', 'Class']).agg(
-        Season_High=('Score', 'max'),
-        Average_Score=('Score', 'mean'),
-        Shows_Attended=('Show', 'count')
-    ).reset_index()
-    return agg_df
+# Just one class at one show, straight off the (Class, Show, Score) index
+def load_show_results(g_class, show):
+    items = list(db["wgi_analytics"].find(
+        {"Class": g_class, "Show": show}, {"_id": 0, "Guard": 1, "Score": 1}
+    ).sort("Score", -1))
+    return pd.DataFrame(items, columns=["Guard", "Score"])
 
-df = load_national_data()
+# --- Season stats are precomputed by the seeder (see season_stats.py) ---
+def load_season_stats(g_class, sort_by):
+    items = list(db["season_stats"].find({"Class": g_class}, {"_id": 0, "refresh_id": 0}).sort(sort_by, 1))
+    return pd.DataFrame(items)
+
+class_index = load_class_index(read_data_version(db, "wgi_analytics"))
 
 
 def load_live_data():
@@ -97,73 +96,67 @@ def load_live_data():
     if live_doc and "data" in live_doc:
         df = pd.DataFrame(live_doc["data"])
         spots_dict = live_doc.get("spots", {}) # Grab the spot counts
-        return df, spots_dict
-    return pd.DataFrame(), {}
+        return df, spots_dict, live_doc.get("version")
+    return pd.DataFrame(), {}, None
+
+# Ensure you unpack all three where you call it (the version drives the Live Hub watcher):
+live_df, live_spots_dict, live_version = load_live_data()
+
+# --- Change watchers ---
+# Instead of reloading the whole page on a timer or sleeping in a spinner, a small fragment polls
+# one field and only reruns the app once it differs from what this page was rendered with.
+LIVE_POLL_SECONDS = 5
+# Give up waiting on a "Refresh Now" that no worker has finished in this long (worker down, never claimed)
+LIVE_REFRESH_TIMEOUT = 2 * LEASE_SECONDS
+STATUS_POLL_SECONDS = 2
+
+@st.fragment(run_every=STATUS_POLL_SECONDS)
+def rerun_on_change(collection, query, field, rendered):
+    doc = db[collection].find_one(query, {field: 1})
+    if (doc or {}).get(field) != rendered:
+        st.rerun(scope="app")
+
+@st.fragment(run_every=LIVE_POLL_SECONDS)
+def live_hub_watcher(rendered_version):
+    live_doc = db["live_state"].find_one({"type": "current_session"}, {"version": 1})
+    changed = (live_doc or {}).get("version") != rendered_version
+
+    # A "Refresh Now" command is deleted by the worker when it's done, or marked failed
+    command_id = st.session_state.get("live_refresh_id")
+    if command_id is not None:
+        command = db["system_state"].find_one({"_id": command_id}, {"status": 1, "error": 1})
+        if command is None:
+            del st.session_state["live_refresh_id"]
+            st.toast("✅ Live scores are up to date." if changed else "✅ Checked WGI, no new scores yet.")
+            # Scores unchanged: nothing to rerender, but the pending caption has to go
+            changed = True
+        elif command.get("status") == "failed":
+            del st.session_state["live_refresh_id"]
+            st.toast(f"❌ Live refresh failed: {command.get('error', 'Unknown error')}")
+            changed = True
+        elif time.time() - st.session_state.get("live_refresh_at", 0) > LIVE_REFRESH_TIMEOUT:
+            del st.session_state["live_refresh_id"]
+            st.toast("⚠️ No worker picked up the refresh. Is the scraper running?")
+            changed = True
+        else:
+            st.caption("⏳ Fetching latest scores...")
 
-# Ensure you unpack both variables where you call it:
-live_df, live_spots_dict = load_live_data()
+    if changed:
+        st.rerun(scope="app")
 
-df = load_national_data()
 
 
-def calculate_advancement(df, event_name, class_spots):
-    """Dynamically calculates Finals advancement based on WGI Regional rules."""
-    
-    # Check if this is a Regional+ event
-    is_plus_event = "+" in event_name
-    
-    # Create the new Status column and default everyone to waiting
-    df['Status'] = "⏳ Pending Score"
-    
-    # Extract the "Base Class" (e.g., "Scholastic A" from "Scholastic A - Round 1")
-    df['Base Class'] = df['Class'].apply(lambda x: x.split(' - ')[0] if ' - ' in x else x)
-    
-    for base_class in df['Base Class'].unique():
-        # How many spots are available for this entire class?
-        total_spots = class_spots.get(base_class, 0)
-        if total_spots == 0: continue
-            
-        class_mask = df['Base Class'] == base_class
-        
-        # --- REGIONAL+ SCHOLASTIC A LOGIC ---
-        if is_plus_event and base_class == "Scholastic A":
-            # Pod 1: Rounds 1 & 2
-            pod1_mask = class_mask & df['Class'].str.contains("Round 1|Round 2", na=False)
-            # Pod 2: Rounds 3 & 4
-            pod2_mask = class_mask & df['Class'].str.contains("Round 3|Round 4", na=False)
-            
-            scored_pod1 = df[pod1_mask & (df['Prelims Score'] > 0.0)]
-            scored_pod2 = df[pod2_mask & (df['Prelims Score'] > 0.0)]
-            
-            # 1. Top 5 from Pod 1
-            pod1_adv = scored_pod1.nlargest(5, 'Prelims Score')
-            df.loc[pod1_adv.index, 'Status'] = "✅ Pod 1 Adv"
-            
-            # 2. Top 5 from Pod 2
-            pod2_adv = scored_pod2.nlargest(5, 'Prelims Score')
-            df.loc[pod2_adv.index, 'Status'] = "✅ Pod 2 Adv"
-            
-            # 3. The 5 Wildcards (Next highest scores overall)
-            remaining_mask = class_mask & (df['Prelims Score'] > 0.0) & (~df.index.isin(pod1_adv.index)) & (~df.index.isin(pod2_adv.index))
-            wildcards = df[remaining_mask].nlargest(5, 'Prelims Score')
-            df.loc[wildcards.index, 'Status'] = "🌟 Wildcard"
-            
-            # 4. Mark the rest as cut
-            below_mask = class_mask & (df['Prelims Score'] > 0.0) & (df['Status'] == "⏳ Pending Score")
-            df.loc[below_mask, 'Status'] = "❌ Below Cutline"
-            
-        # --- STANDARD ADVANCEMENT LOGIC ---
-        else:
-            scored = df[class_mask & (df['Prelims Score'] > 0.0)]
-            advanced = scored.nlargest(total_spots, 'Prelims Score')
-            
-            df.loc[advanced.index, 'Status'] = "✅ Advanced"
-            
-            below_mask = class_mask & (df['Prelims Score'] > 0.0) & (~df.index.isin(advanced.index))
-            df.loc[below_mask, 'Status'] = "❌ Below Cutline"
-            
-    # Clean up the dataframe for display
-    return df
+# --- Projector odds (simulated by the worker, see simulator.py) ---
+ODDS_COLUMNS = {"Advance Chance": "Advance %", "Pod Chance": "Pod %", "Wildcard Chance": "Wildcard %"}
+
+def odds_columns(df):
+    return [c for c in ODDS_COLUMNS if c in df.columns and df[c].notna().any()]
+
+def format_odds(df):
+    for col, label in ODDS_COLUMNS.items():
+        if col in df.columns:
+            df[col] = df[col].apply(lambda x: f"{x:.0%}" if pd.notna(x) else "—")
+    return df.rename(columns=ODDS_COLUMNS)
 
 st.title("🏆 WGI 2026 Color Guard Analytics")
 tab1, tab2, tab3, tab6, tab5, tab4  = st.tabs(["Overview", "National Comparison", "Live Hub", "Projector", "Past Events", "Admin"])
@@ -171,17 +164,17 @@ tab1, tab2, tab3, tab6, tab5, tab4  = st.tabs(["Overview", "National Comparison"
 # --- TAB 1: National Rankings ---
 with tab1:
     st.header("National Class Rankings")
-    if df.empty: 
+    if not class_index: 
         st.warning("No data found. Run seed_db.py to populate the database.")
     else:
         # 1. Select the Division
         c1, c2 = st.columns(2)
         with c1:
-            sel_class = st.selectbox("1. Division:", sorted(df['Class'].unique()), key="nav_class")
+            sel_class = st.selectbox("1. Division:", sorted(class_index), key="nav_class")
         
         # 2. Select the Show (Filters based on the chosen division)
         with c2:
-            available_shows = sorted(df[df['Class'] == sel_class]['Show'].unique())
+            available_shows = class_index.get(sel_class, [])
             sel_show = st.selectbox("2. Event:", ["All Shows"] + available_shows, key="nav_show")
 
         st.divider()
@@ -189,21 +182,21 @@ with tab1:
         # 3. Dynamic Display Logic
         if sel_show == "All Shows":
             # Display Aggregated Season Data
-            c_df = df[df['Class'] == sel_class].copy()
-            agg_df = get_aggregated_national_data(c_df)
-            agg_df = agg_df.sort_values(by='Season_High', ascending=False)
-            agg_df['Rank'] = range(1, len(agg_df) + 1)
+            agg_df = load_season_stats(sel_class, "High_Rank")
             
             st.subheader(f"Overall National Rankings: {sel_class}")
-            st.dataframe(
-                agg_df[['Rank', 'Guard', 'Season_High', 'Average_Score', 'Shows_Attended']], 
-                width='stretch', 
-                hide_index=True
-            )
+            if agg_df.empty:
+                st.info("Season stats haven't been built yet. Run seed_db.py (or season_stats.py).")
+            else:
+                agg_df['Rank'] = agg_df['High_Rank']
+                st.dataframe(
+                    agg_df[['Rank', 'Guard', 'Season_High', 'Average_Score', 'Shows_Attended']], 
+                    width='stretch', 
+                    hide_index=True
+                )
         else:
             # Display Specific Event Results
-            c_df = df[(df['Class'] == sel_class) & (df['Show'] == sel_show)].copy()
-            c_df = c_df.sort_values(by='Score', ascending=False)
+            c_df = load_show_results(sel_class, sel_show)
             c_df['Rank'] = range(1, len(c_df) + 1)
             
             st.subheader(f"Results: {sel_show}")
@@ -216,23 +209,20 @@ with tab1:
 # --- TAB 2: Compare Guards (BSI) ---
 with tab2:
     st.header("Guard Comparison Calculator")
-    if df.empty:
+    # The BSI calculator reads the precomputed averages, highs and ranks
+    stat_classes = sorted(db["season_stats"].distinct("Class"))
+    if not stat_classes:
         st.info("Sync national data in the Admin tab first.")
     else:
-        # The BSI calculator needs the aggregated data (Averages and Highs)
-        agg_national_df = get_aggregated_national_data(df)
-        
         c1, c2 = st.columns(2)
         with c1: 
-            sel_class_bsi = st.selectbox("1. Select Division", sorted(agg_national_df['Class'].unique()), key="comp_class")
+            sel_class_bsi = st.selectbox("1. Select Division", stat_classes, key="comp_class")
         
-        # Filter down to the selected class
-        comp_df = agg_national_df[agg_national_df['Class'] == sel_class_bsi].copy().sort_values(by='Average_Score', ascending=False)
+        # Already ranked by average within the class
+        comp_df = load_season_stats(sel_class_bsi, "Rank")
         
         # SAFETY NET: Make sure the class isn't empty before calculating ranks
         if not comp_df.empty:
-            comp_df['Rank'] = range(1, len(comp_df) + 1)
-            
             with c2: 
                 sel_guard = st.selectbox("2. Select Guard", sorted(comp_df['Guard'].unique()), key="comp_guard")
 
@@ -290,9 +280,6 @@ with tab2:
 
 # --- TAB 3: Live Hub ---
 with tab3:
-    from streamlit_autorefresh import st_autorefresh
-    st_autorefresh(interval=180000, key="hub_refresh")
-    
     st.header("Live Event Signal")
     
     c1, c2 = st.columns([0.8, 0.2])
@@ -301,19 +288,19 @@ with tab3:
         show_name = active_show["name"] if active_show else "Unknown Show"
         st.subheader(f"📊 Live Signal: {show_name}")
     with c2:
-        if st.button("🔄 Refresh Now"):
+        if st.button("🔄 Refresh Now", disabled="live_refresh_id" in st.session_state):
             active_show = db["system_state"].find_one({"type": "active_show_name"})
             if active_show:
-                db["system_state"].insert_one({
-                    "type": "scraper_command",
-                    "action": "sync_live",
-                    "show_id": active_show.get("show_id"),
-                    "prelims_url": active_show.get("p_url"),
-                    "finals_url": active_show.get("f_url")
-                })
-                with st.spinner("Fetching latest scores..."):
-                    time.sleep(15)
+                # The watcher below reports back as soon as the worker finishes
+                st.session_state.live_refresh_id = enqueue_command(
+                    db["system_state"], "sync_live",
+                    show_id=active_show.get("show_id"),
+                    prelims_url=active_show.get("p_url"),
+                    finals_url=active_show.get("f_url")
+                ).inserted_id
+                st.session_state.live_refresh_at = time.time()
             st.rerun()
+        live_hub_watcher(live_version)
             
     if live_df.empty:
         st.info("⚪ System Idle: No live show currently latched. Load one via Admin.")
@@ -462,7 +449,7 @@ with tab4:
                 {"$set": {"status": "running"}},
                 upsert=True
             )
-            db["system_state"].insert_one({"type": "scraper_command", "action": "sync_national"})
+            enqueue_command(db["system_state"], "sync_national")
             st.rerun()
 
         # Show status indicator
@@ -470,15 +457,17 @@ with tab4:
         if discovery_doc:
             status = discovery_doc.get("status")
             if status == "running":
-                with st.spinner("Auto-Discovery running in background..."):
-                    import time
-                    time.sleep(2)
-                    st.rerun()
+                st.info("⏳ Auto-Discovery running in background...")
+                rerun_on_change("system_state", {"type": "discovery_status"}, "status", status)
             elif status == "complete":
                 count = discovery_doc.get("count", 0)
                 st.success(f"✅ Auto-Discovery complete! {count} events found.")
             elif status == "failed":
                 st.error(f"❌ Auto-Discovery failed: {discovery_doc.get('error', 'Unknown error')}")
+
+        if st.button("📦 Backfill Past Event Archives"):
+            enqueue_command(db["system_state"], "sync_archive_backfill")
+            st.toast("Backfill queued. Past Events will fill in as the worker finishes each show.")
         
         
 
@@ -531,13 +520,12 @@ with tab4:
                         {"$set": {"p_url": p_url, "f_url": f_url}}
                     )
                     
-                    db["system_state"].insert_one({
-                        "type": "scraper_command", 
-                        "action": "sync_live", 
-                        "show_id": target_show_id,
-                        "prelims_url": p_url, 
-                        "finals_url": f_url
-                    })
+                    enqueue_command(
+                        db["system_state"], "sync_live",
+                        show_id=target_show_id,
+                        prelims_url=p_url, 
+                        finals_url=f_url
+                    )
                     
                     db["system_state"].update_one(
                         {"type": "active_show_name"}, 
@@ -597,13 +585,12 @@ with tab4:
                         {"$set": {"status": "loading", "show_name": selected_proj_event}},
                         upsert=True
                     )
-                    db["system_state"].insert_one({
-                        "type": "scraper_command",
-                        "action": "sync_projection",
-                        "show_name": selected_proj_event,
-                        "prelims_url": proj_p_url,
-                        "finals_url": proj_f_url
-                    })
+                    enqueue_command(
+                        db["system_state"], "sync_projection",
+                        show_name=selected_proj_event,
+                        prelims_url=proj_p_url,
+                        finals_url=proj_f_url
+                    )
                     st.toast(f"Projection command sent for {selected_proj_event}!")
                     st.rerun()
 
@@ -628,47 +615,50 @@ with tab5:
         c1, c2 = st.columns([0.8, 0.2])
         with c1:
             selected_archive = st.selectbox("Select Completed Event:", ["-- Choose an Event --"] + list(event_dict.keys()))
+
+        # Leaderboards are cached per ShowId; final ones are served without asking the worker unless re-checked
+        archive_doc = None
+        if selected_archive != "-- Choose an Event --":
+            archive_doc = db["archive_state"].find_one({"type": "archive", "show_id": event_dict[selected_archive]})
+        is_final = bool(archive_doc and archive_doc.get("final"))
+
         with c2:
             st.write("") # Spacing
             st.write("")
-            if st.button("📥 Request Scores") and selected_archive != "-- Choose an Event --":
+            if st.button("🔄 Re-check Scores" if is_final else "📥 Request Scores") and selected_archive != "-- Choose an Event --":
                 target_id = event_dict[selected_archive]
                 
-                # 1. Set the database flag to "loading"
+                # 1. Set the database flag to "loading" (any cached scores stay put)
                 db["archive_state"].update_one(
-                    {"type": "current_archive"},
-                    {"$set": {"status": "loading", "event_name": selected_archive, "show_id": target_id}},
+                    {"type": "archive", "show_id": target_id},
+                    {"$set": {"status": "loading", "event_name": selected_archive}},
                     upsert=True
                 )
                 
                 # 2. Send the command to the worker
-                db["system_state"].insert_one({
-                    "type": "scraper_command", 
-                    "action": "sync_archive", 
-                    "show_id": target_id,
-                    "event_name": selected_archive
-                })
+                enqueue_command(
+                    db["system_state"], "sync_archive",
+                    show_id=target_id,
+                    event_name=selected_archive,
+                    force=is_final
+                )
                 # 3. Instantly rerun the page to trigger the spinner below
                 st.rerun() 
         
         st.divider()
         
         # --- THE AUTO-REFRESH LOGIC ---
-        archive_doc = db["archive_state"].find_one({"type": "current_archive"})
-        
-        if archive_doc and archive_doc.get("event_name") == selected_archive:
+        if archive_doc:
             status = archive_doc.get("status")
             
             if status == "loading":
-                # Streamlit will spin, wait 2 seconds, and refresh itself!
-                with st.spinner("Worker is extracting scores from WGI (Waiting for Salesforce)..."):
-                    import time
-                    time.sleep(2)
-                    st.rerun() 
+                # The page reruns by itself as soon as the worker flips the status
+                st.info("⏳ Worker is extracting scores from WGI (Waiting for Salesforce)...")
+                rerun_on_change("archive_state", {"type": "archive", "show_id": archive_doc["show_id"]}, "status", status)
                     
             elif status == "complete":
                 c1, c2 = st.columns([0.8, 0.2])
-                with c1: st.success(f"✅ Displaying Leaderboard for: {selected_archive}")
+                with c1: st.success(f"✅ Displaying {'Final ' if is_final else ''}Leaderboard for: {selected_archive}")
                 with c2: 
                     # Keep a manual refresh button just in case
                     if st.button("🔄 Refresh View"): st.rerun()
@@ -726,6 +716,9 @@ with tab6:
             st.success(f"📍 Projecting: **{show_name}**")
             proj_df = pd.DataFrame(proj_data)
 
+            if "Advance Chance" in proj_df.columns:
+                st.caption("Advance / Pod / Wildcard odds come from simulated runs of the show using each guard's season average and spread.")
+
             # Reuse calculate_advancement exactly like the Live Hub
             proj_df = calculate_advancement(proj_df, show_name, proj_spots)
 
@@ -746,11 +739,12 @@ with tab6:
                     col1.metric("Teams Registered", len(class_df))
                     col2.metric("Teams With Season Data", len(class_df[class_df["Prelims Score"] > 0]))
 
-                    display_cols = class_df[["Guard", "Prelims Score", "Status"]].copy()
+                    display_cols = class_df[["Guard", "Prelims Score", "Status"] + odds_columns(class_df)].copy()
                     display_cols = display_cols.rename(columns={"Prelims Score": "Avg Score"})
                     display_cols["Avg Score"] = display_cols["Avg Score"].apply(
                         lambda x: f"{x:.3f}" if x > 0 else "No Data"
                     )
+                    display_cols = format_odds(display_cols)
                     display_cols.insert(0, "Proj. Rank", range(1, len(display_cols) + 1))
                     st.dataframe(display_cols, hide_index=True, width='stretch')
 
@@ -761,9 +755,10 @@ with tab6:
                     sa_df = sa_df.sort_values("Prelims Score", ascending=False).reset_index(drop=True)
                     sa_df.insert(0, "Overall Rank", range(1, len(sa_df) + 1))
 
-                    display_sa = sa_df[["Overall Rank", "Guard", "Class", "Prelims Score", "Status"]].copy()
+                    display_sa = sa_df[["Overall Rank", "Guard", "Class", "Prelims Score", "Status"] + odds_columns(sa_df)].copy()
                     display_sa = display_sa.rename(columns={"Prelims Score": "Avg Score", "Class": "Round"})
                     display_sa["Avg Score"] = display_sa["Avg Score"].apply(
                         lambda x: f"{x:.3f}" if x > 0 else "No Data"
                     )
+                    display_sa = format_odds(display_sa)
                     st.dataframe(display_sa, hide_index=True, width='stretch')
\ No newline at end of file
@@ -0,0 +1,18 @@
+import time
+
+
+def bump_data_version(db, name):
+    """Records that collection `name` changed, so cached readers know to reload it."""
+    doc = db["system_state"].find_one_and_update(
+        {"type": "data_version", "collection": name},
+        {"$inc": {"version": 1}, "$set": {"updated_at": time.time()}},
+        upsert=True,
+        return_document=True
+    )
+    return doc["version"]
+
+
+def read_data_version(db, name):
+    """Current version token for collection `name` (0 if it was never bumped)."""
+    doc = db["system_state"].find_one({"type": "data_version", "collection": name}, {"version": 1})
+    return doc["version"] if doc else 0
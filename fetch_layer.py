@@ -0,0 +1,161 @@
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+import requests
+from requests.adapters import HTTPAdapter
+from page_ready import READY_TARGETS, wait_until_ready
+
+# Markers proving a plain HTTP response already carries the content (and isn't just a JS shell)
+HTTP_MARKERS = {
+    "calendar":     re.compile(r"event-details-page"),
+    "event_page":   re.compile(r"<a[^>]*>[^<]*(?:prelims|finals)", re.IGNORECASE),
+    "scores_index": re.compile(r"ShowId="),
+    "score_event":  re.compile(r"division-name"),
+    "schedule":     re.compile(r"schedule-row"),
+}
+
+
+def fetch_pages_concurrently(context, urls, concurrency, ready_target):
+    """Loads URLs in batches of parallel tabs and returns their HTML in input order.
+
+    None for a page that failed to load or never showed its readiness marker.
+    """
+    results = [None] * len(urls)
+    if not urls:
+        return results
+
+    pages = [context.new_page() for _ in range(max(1, min(concurrency, len(urls))))]
+    try:
+        for start in range(0, len(urls), len(pages)):
+            batch = list(enumerate(urls[start:start + len(pages)], start))
+
+            # Only wait for the navigation to commit so every tab in the batch loads at once
+            started = []
+            for page, (idx, url) in zip(pages, batch):
+                try:
+                    page.goto(url, wait_until="commit")
+                    started.append((page, idx, url))
+                except Exception as e:
+                    print(f"⚠️ [FETCH] Error loading {url}: {e}")
+
+            if not started:
+                continue
+
+            # The tabs load side by side, so the whole batch shares one readiness deadline
+            deadline = time.perf_counter() + READY_TARGETS[ready_target]["timeout"] / 1000
+            for page, idx, url in started:
+                try:
+                    remaining_ms = (deadline - time.perf_counter()) * 1000
+                    # An unrendered shell isn't a page; leave it as None
+                    if wait_until_ready(page, ready_target, timeout_ms=remaining_ms):
+                        results[idx] = page.content()
+                except Exception as e:
+                    print(f"⚠️ [FETCH] Error reading {url}: {e}")
+    finally:
+        for page in pages:
+            page.close()
+
+    return results
+
+
+class PageFetcher:
+    """HTTP-first page fetcher.
+
+    Tries a pooled requests session first and only escalates to Playwright when
+    the response lacks the markers for its target. Records which path served each URL.
+    """
+
+    def __init__(self, browser_pool, user_agent, http_timeout=15, pool_size=8):
+        self.browser_pool = browser_pool
+        self.http_timeout = http_timeout
+        self.session = requests.Session()
+        self.session.headers.update({"User-Agent": user_agent})
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=1)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+        self._lock = threading.Lock()
+        self.served_by = {}
+        self.totals = {path: {"pages": 0, "seconds": 0.0} for path in ("http", "browser", "failed")}
+
+    # --- FETCH PATHS ---
+    def _try_http(self, url, target):
+        started = time.perf_counter()
+        try:
+            response = self.session.get(url, timeout=self.http_timeout)
+        except requests.RequestException:
+            return None
+
+        if response.ok and HTTP_MARKERS[target].search(response.text):
+            self._record(url, "http", time.perf_counter() - started)
+            return response.text
+        return None
+
+    def _fetch_browser(self, url, target):
+        started = time.perf_counter()
+        try:
+            with self.browser_pool.page() as page:
+                page.goto(url)
+                # Without the marker we'd only have the JavaScript shell, which callers can't use
+                html = page.content() if wait_until_ready(page, target) else None
+        except Exception as e:
+            print(f"⚠️ [FETCH] Browser fetch failed for {url}: {e}")
+            html = None
+
+        if html is None:
+            self._record(url, "failed", time.perf_counter() - started)
+            return None
+
+        self._record(url, "browser", time.perf_counter() - started)
+        return html
+
+    def fetch(self, url, target):
+        """Returns the page HTML for `url`, or None if neither path could load it."""
+        html = self._try_http(url, target)
+        if html is None:
+            html = self._fetch_browser(url, target)
+        return html
+
+    def fetch_many(self, urls, target, concurrency):
+        """Fetches URLs concurrently over HTTP, then escalates the misses to a batch of browser tabs."""
+        if not urls:
+            return []
+
+        with ThreadPoolExecutor(max_workers=max(1, concurrency)) as executor:
+            results = list(executor.map(lambda u: self._try_http(u, target), urls))
+
+        missing = [i for i, html in enumerate(results) if html is None]
+        if missing:
+            started = time.perf_counter()
+            with self.browser_pool.context() as context:
+                browser_html = fetch_pages_concurrently(context, [urls[i] for i in missing], concurrency, target)
+            per_page = (time.perf_counter() - started) / len(missing)
+
+            for i, html in zip(missing, browser_html):
+                results[i] = html
+                self._record(urls[i], "browser" if html is not None else "failed", per_page)
+
+        return results
+
+    # --- BOOKKEEPING ---
+    def _record(self, url, path, seconds):
+        with self._lock:
+            self.served_by[url] = {"path": path, "seconds": round(seconds, 3)}
+            self.totals[path]["pages"] += 1
+            self.totals[path]["seconds"] += seconds
+
+    def stats(self):
+        with self._lock:
+            return {
+                "totals": {path: {"pages": t["pages"], "seconds": round(t["seconds"], 3)} for path, t in self.totals.items()},
+                "served_by": [{"url": url, **entry} for url, entry in self.served_by.items()],
+            }
+
+    def report(self):
+        totals = self.stats()["totals"]
+        print(
+            f"📊 [FETCH] HTTP: {totals['http']['pages']} pages ({totals['http']['seconds']:.1f}s) | "
+            f"Browser: {totals['browser']['pages']} pages ({totals['browser']['seconds']:.1f}s) | "
+            f"Failed: {totals['failed']['pages']}"
+        )
@@ -0,0 +1,43 @@
+import os
+import re
+import time
+
+# A show whose scores haven't moved for this long is over, even without a finals round
+SETTLE_HOURS = int(os.environ.get("WGI_SETTLE_HOURS", "48"))
+
+
+class FinalsTracker:
+    """Which classes on a score page have posted prelims and which have posted finals.
+
+    Finals divisions post one at a time, so a single "Finals" header doesn't end a show:
+    finals are only complete once every class with a prelims (or round / semi) division has
+    a finals division too.
+    """
+
+    def __init__(self):
+        self.prelims = set()
+        self.finals = set()
+
+    def add(self, raw_class, base_class):
+        """Records a scored row from division `raw_class` (e.g. "Scholastic A - Finals")."""
+        # Semi-Finals are a prelim round, whatever the header says
+        if re.search(r'(?i)prelim|round|semi', raw_class):
+            self.prelims.add(base_class)
+        elif "Final" in raw_class:
+            self.finals.add(base_class)
+
+    @property
+    def complete(self):
+        return bool(self.finals) and self.prelims <= self.finals
+
+
+def settle_final(finals_complete, unchanged, changed_at=None, now=None):
+    """Returns (final, changed_at) for a re-scraped show.
+
+    `changed_at` is when its scores last moved (carried over while they stay `unchanged`).
+    A show is final once its finals are complete, or once nothing has moved for SETTLE_HOURS.
+    Two identical scrapes on their own prove nothing: they happen between any two postings.
+    """
+    now = now or time.time()
+    changed_at = (changed_at or now) if unchanged else now
+    return finals_complete or now - changed_at >= SETTLE_HOURS * 3600, changed_at
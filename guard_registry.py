@@ -0,0 +1,229 @@
+import re
+import threading
+from collections import defaultdict
+import pymongo
+
+# Spelling differences between WGI scores, CompetitionSuite and the schedule PDFs
+ABBREVIATIONS = {
+    "hs": "high school",
+    "h.s.": "high school",
+    "ms": "middle school",
+    "wg": "winterguard",
+    "acad": "academy",
+    "st": "saint",
+    "&": "and",
+}
+# Words that say "this is a guard" without telling guards apart
+GENERIC_WORDS = {"the", "winterguard", "winter", "colorguard", "color", "guard", "percussion", "indoor"}
+# Institution words: shared by half the field, so they can't be what makes two names match
+INSTITUTION_WORDS = {"high", "school", "middle", "academy", "and", "of", "saint", "independent", "performing", "arts"}
+# Tokens that separate sibling units from the same school (Avon JV vs Avon Varsity, "Centerville A" vs "B",
+# Avon Intermediate East vs West)
+# Whose spelling becomes the display name: WGI's score pages beat the schedule pages, which beat
+# names recovered from schedule PDFs (where "DEast" has to be guessed back to "East")
+SOURCE_PRIORITY = {"pdf": 0, "schedule": 1, "scores": 2}
+
+QUALIFIER = re.compile(
+    r"^(jv|varsity|junior|senior|open|world|[ivx]+|\d+|[a-z]"
+    r"|north|south|east|west|northeast|northwest|southeast|southwest|central|upper|lower)$"
+)
+
+
+def name_key(name):
+    """Normalized matching key for a guard name."""
+    text = name.lower().replace("winter guard", "winterguard").replace("color guard", "colorguard")
+    tokens = []
+    for token in re.split(r"[\s\-–/,]+", text):
+        token = ABBREVIATIONS.get(token, token)
+        token = re.sub(r"[^a-z0-9 ]", "", token)
+        token = ABBREVIATIONS.get(token, token)
+        tokens.extend(t for t in token.split() if t and t not in GENERIC_WORDS)
+    return " ".join(tokens)
+
+
+def _trigrams(key):
+    padded = f"  {key} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def _dice(a, b):
+    return 2 * len(a & b) / (len(a) + len(b)) if a or b else 0.0
+
+
+def _core(key):
+    return " ".join(token for token in key.split() if token not in INSTITUTION_WORDS)
+
+
+def _qualifiers(key):
+    return {token for token in key.split() if QUALIFIER.match(token)}
+
+
+class GuardRegistry:
+    """Canonical guard names shared by every parser, persisted in MongoDB.
+
+    Each guard has an id, a display name and the matching keys of every variant it has been seen
+    under. The display name is the first spelling seen from the highest-priority source (see
+    SOURCE_PRIORITY), so WGI's own score-page spelling replaces a guess from a PDF. Exact keys resolve from a dict; unseen spellings go through a
+    trigram index and match an existing guard when they're similar enough and agree on qualifiers
+    like JV / Varsity. Safe to share between threads.
+    """
+
+    def __init__(self, collection, threshold=0.82):
+        self.collection = collection
+        self.threshold = threshold
+        self._lock = threading.Lock()
+        self._by_key = {}
+        self._names = {}
+        self._name_priority = {}
+        self._trigrams = {}
+        self._index = defaultdict(set)
+        self.collection.create_index([("variants", pymongo.ASCENDING)])
+        self.load()
+
+    def load(self):
+        with self._lock:
+            for doc in self.collection.find({}, {"name": 1, "name_priority": 1, "variants": 1}):
+                self._add_local(doc["_id"], doc["name"], doc.get("variants", []), doc.get("name_priority", 0))
+
+    def _add_local(self, guard_id, name, keys, priority=0):
+        if guard_id not in self._names or priority > self._name_priority[guard_id]:
+            self._names[guard_id] = name
+            self._name_priority[guard_id] = priority
+        for key in keys:
+            self._by_key[key] = guard_id
+            grams = _trigrams(key)
+            self._trigrams.setdefault(guard_id, set()).update(grams)
+            for gram in grams:
+                self._index[gram].add(guard_id)
+
+    def _fuzzy(self, key):
+        grams = _trigrams(key)
+        overlap = defaultdict(int)
+        for gram in grams:
+            for guard_id in self._index.get(gram, ()):
+                overlap[guard_id] += 1
+
+        best_id, best_score = None, 0.0
+        for guard_id, shared in overlap.items():
+            score = 2 * shared / (len(grams) + len(self._trigrams[guard_id]))
+            if score > best_score:
+                best_id, best_score = guard_id, score
+        if best_score < self.threshold:
+            return None
+
+        # "Madison HS" vs "Mason HS" overlap mostly on "high school"; the rest has to match too
+        other = name_key(self._names[best_id])
+        if _qualifiers(other) != _qualifiers(key):
+            return None
+        if _dice(_trigrams(_core(other)), _trigrams(_core(key))) < self.threshold:
+            return None
+        return best_id
+
+    def _claim_name(self, guard_id, name, priority):
+        """Makes `name` the display name if it comes from a better source than the current one."""
+        if priority <= self._name_priority.get(guard_id, 0):
+            return
+        # Only wins if nobody stored a name from an equal or better source in the meantime
+        self.collection.update_one(
+            {"_id": guard_id, "$or": [{"name_priority": {"$lt": priority}}, {"name_priority": {"$exists": False}}]},
+            {"$set": {"name": name, "name_priority": priority}}
+        )
+        self._add_local(guard_id, name, [], priority)
+
+    def resolve(self, name, source="pdf"):
+        """Returns the guard id for `name`, registering it (or the new spelling) if needed.
+
+        `source` is a SOURCE_PRIORITY key; a better source than the current display name's takes it over.
+        """
+        key = name_key(name)
+        if not key:
+            return None
+        name = name.strip()
+        priority = SOURCE_PRIORITY[source]
+
+        with self._lock:
+            guard_id = self._by_key.get(key)
+            if guard_id is None:
+                # Another worker may have registered it since we loaded
+                doc = self.collection.find_one({"variants": key}, {"name": 1, "name_priority": 1, "variants": 1})
+                if doc:
+                    self._add_local(doc["_id"], doc["name"], doc.get("variants", []), doc.get("name_priority", 0))
+                    guard_id = doc["_id"]
+
+            if guard_id is None:
+                guard_id = self._fuzzy(key)
+                if guard_id is None:
+                    guard_id = key
+                    self.collection.update_one(
+                        {"_id": guard_id},
+                        {"$setOnInsert": {"name": name, "name_priority": priority}, "$addToSet": {"variants": key}},
+                        upsert=True
+                    )
+                else:
+                    print(f"🔗 [GUARDS] '{name}' -> '{self._names[guard_id]}'")
+                    self.collection.update_one({"_id": guard_id}, {"$addToSet": {"variants": key}})
+                self._add_local(guard_id, name, [key], priority if guard_id == key else 0)
+
+            self._claim_name(guard_id, name, priority)
+            return guard_id
+
+    def canonical(self, name, source="pdf"):
+        """The display name every source should use for `name` (see resolve for `source`)."""
+        guard_id = self.resolve(name, source)
+        if guard_id is None:
+            return name
+        with self._lock:
+            return self._names[guard_id]
+
+
+def migrate_guard_names(db, registry=None):
+    """One-off: rewrites wgi_analytics.Guard to canonical names, merging rows that collide.
+
+    Stored spellings first register as score-page names (so WGI's spelling wins over older PDF
+    guesses), then rows are moved to their canonical name, keeping the higher score. Returns
+    the number of rows moved.
+    """
+    from pymongo import DeleteOne, UpdateOne
+
+    registry = registry or GuardRegistry(db["guard_registry"])
+    collection = db["wgi_analytics"]
+    stored = collection.distinct("Guard")
+    # Rows already renamed to a schedule/PDF guess don't carry WGI's spelling, so they can't claim a name
+    guessed = {
+        name for guard_id, name in registry._names.items()
+        if registry._name_priority[guard_id] < SOURCE_PRIORITY["scores"]
+    }
+    for guard in stored:
+        if guard not in guessed:
+            registry.resolve(guard, source="scores")
+
+    moved = 0
+    for guard in stored:
+        canonical = registry.canonical(guard)
+        if canonical == guard:
+            continue
+        ops = []
+        for row in collection.find({"Guard": guard}, {"Class": 1, "Show": 1, "Score": 1}):
+            ops.append(UpdateOne(
+                {"Guard": canonical, "Class": row["Class"], "Show": row["Show"]},
+                {"$max": {"Score": row["Score"]}},
+                upsert=True
+            ))
+            ops.append(DeleteOne({"_id": row["_id"]}))
+        if ops:
+            collection.bulk_write(ops, ordered=True)
+            moved += len(ops) // 2
+            print(f"🔗 [GUARDS] '{guard}' -> '{canonical}' ({len(ops) // 2} rows)")
+    return moved
+
+
+if __name__ == "__main__":
+    # One-off migration of wgi_analytics to canonical guard names
+    from seed_db import connect_db
+    from season_stats import refresh_season_stats
+    from data_version import bump_data_version
+
+    db = connect_db()
+    if migrate_guard_names(db):
+        refresh_season_stats(db)
+        bump_data_version(db, "wgi_analytics")
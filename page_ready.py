@@ -0,0 +1,57 @@
+import threading
+import time
+from playwright.sync_api import TimeoutError as PlaywrightTimeoutError
+
+# What "ready" means for each kind of page we scrape, and how long we give it (ms).
+# "settle" is a short grace period after the marker appears for sibling content to finish rendering.
+READY_TARGETS = {
+    "calendar":     {"selector": "a[href*='event-details-page']", "timeout": 15000},
+    "event_page":   {"selector": "a:text-matches('prelims|finals', 'i')", "timeout": 8000},
+    "scores_index": {"selector": "a[href*='ShowId=']", "timeout": 20000},
+    "score_event":  {"selector": "table td:nth-child(3)", "timeout": 15000, "settle": 500},
+    "schedule":     {"selector": ".schedule-row", "timeout": 15000},
+}
+
+_stats_lock = threading.Lock()
+_wait_stats = {}
+
+
+def wait_until_ready(page, target, timeout_ms=None):
+    """Blocks until the page shows the content `target` needs. Returns False if it never showed up."""
+    spec = READY_TARGETS[target]
+    timeout = spec["timeout"] if timeout_ms is None else timeout_ms
+    started = time.perf_counter()
+
+    try:
+        page.wait_for_selector(spec["selector"], state="attached", timeout=max(1, int(timeout)))
+        if spec.get("settle"):
+            page.wait_for_timeout(spec["settle"])
+        ready = True
+    except PlaywrightTimeoutError:
+        ready = False
+
+    elapsed = time.perf_counter() - started
+    _record(target, elapsed, ready)
+    if ready:
+        print(f"⏱️ [WAIT] {target} ready in {elapsed:.2f}s")
+    else:
+        print(f"⏱️ [WAIT] {target} not ready after {elapsed:.2f}s")
+    return ready
+
+
+def _record(target, elapsed, ready):
+    with _stats_lock:
+        stats = _wait_stats.setdefault(target, {"waits": 0, "timeouts": 0, "total_s": 0.0, "max_s": 0.0})
+        stats["waits"] += 1
+        stats["timeouts"] += 0 if ready else 1
+        stats["total_s"] += elapsed
+        stats["max_s"] = max(stats["max_s"], elapsed)
+
+
+def wait_stats():
+    """Per-target wait counts, timeouts and timings since the process started."""
+    with _stats_lock:
+        return {
+            target: {**stats, "avg_s": round(stats["total_s"] / stats["waits"], 3)}
+            for target, stats in _wait_stats.items()
+        }
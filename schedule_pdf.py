@@ -0,0 +1,193 @@
+import copy
+import hashlib
+import multiprocessing
+import os
+import shutil
+import tempfile
+import threading
+from concurrent.futures import ProcessPoolExecutor
+import pdfplumber
+import requests
+
+
+# Pages per process-pool task: small enough to spread one PDF across workers, big enough to amortize the pickling
+PAGES_PER_TASK = 4
+_page_pool = None
+_page_pool_lock = threading.Lock()
+
+
+def _warm_up(_):
+    return None
+
+
+def start_page_pool(workers):
+    """Starts the process pool that extracts PDF pages in parallel (workers <= 1 keeps parsing serial).
+
+    Workers are spawned fresh rather than forked, so it's safe to call once the process has threads
+    (pymongo's monitors, lane threads). Like any spawned child they import the main module, but not
+    its __main__ block.
+    """
+    global _page_pool
+    with _page_pool_lock:
+        if _page_pool is None and workers > 1:
+            _page_pool = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"))
+            # Pays the interpreter start-up for every worker now rather than on the first schedule
+            list(_page_pool.map(_warm_up, range(workers)))
+    return _page_pool
+
+
+def _extract_pages(path, page_numbers):
+    texts = []
+    with pdfplumber.open(path, pages=page_numbers) as pdf:
+        for page in pdf.pages:
+            try:
+                texts.append(page.extract_text())
+            finally:
+                page.close()
+    return texts
+
+
+def _iter_page_texts(pdf_file):
+    with pdfplumber.open(pdf_file) as pdf:
+        for page in pdf.pages:
+            try:
+                yield page.extract_text()
+            finally:
+                # Drops the page's parsed layout so long schedules don't pile up in memory
+                page.close()
+
+
+def _iter_page_texts_parallel(pdf_file):
+    # Pool workers open the PDF themselves, so it has to be a real file on disk
+    path = getattr(pdf_file, "name", None)
+    copied = not (isinstance(path, str) and os.path.exists(path))
+    if copied:
+        with tempfile.NamedTemporaryFile(suffix=".pdf", delete=False) as tmp:
+            pdf_file.seek(0)
+            shutil.copyfileobj(pdf_file, tmp)
+        path = tmp.name
+
+    try:
+        with pdfplumber.open(path) as pdf:
+            page_count = len(pdf.pages)
+        chunks = [
+            list(range(first, min(first + PAGES_PER_TASK, page_count + 1)))
+            for first in range(1, page_count + 1, PAGES_PER_TASK)
+        ]
+        # map() hands results back in submission order, so pages come out in document order
+        for texts in _page_pool.map(_extract_pages, [path] * len(chunks), chunks):
+            yield from texts
+    finally:
+        if copied:
+            os.unlink(path)
+
+
+def iter_pdf_lines(pdf_file):
+    """Yields a PDF's stripped text lines in page order.
+
+    Pages are extracted on the process pool when start_page_pool() was called, otherwise one at a
+    time on this thread. Both produce the same lines.
+    """
+    texts = _iter_page_texts_parallel(pdf_file) if _page_pool is not None else _iter_page_texts(pdf_file)
+    for text in texts:
+        if not text: continue
+
+        for line in text.split('\n'):
+            yield line.strip()
+
+
+class SchedulePdfCache:
+    """Conditional-GET cache for schedule PDFs.
+
+    Remembers each URL's ETag / Last-Modified and a SHA-256 of its bytes, along with
+    whatever was parsed out of them, so an unchanged PDF is never downloaded or parsed twice.
+    With a ScheduleStore attached, entries also survive worker restarts.
+    """
+
+    def __init__(self, user_agent, timeout=30, store=None, spool_bytes=4 * 1024 * 1024):
+        self.timeout = timeout
+        self.spool_bytes = spool_bytes
+        self.store = store
+        self.session = requests.Session()
+        self.session.headers.update({"User-Agent": user_agent})
+        self._lock = threading.Lock()
+        self._entries = {}
+
+    def fetch_parsed(self, url, kind, parse_fn):
+        """Returns parse_fn(pdf_file) for the PDF currently at `url`, reusing the cached result if the bytes haven't changed."""
+        with self._lock:
+            entry = self._entries.get(url)
+
+        if (not entry or kind not in entry["parsed"]) and self.store is not None:
+            entry = self._load_stored(url, kind, entry)
+
+        headers = {}
+        if entry and kind in entry["parsed"]:
+            if entry["etag"]:
+                headers["If-None-Match"] = entry["etag"]
+            if entry["last_modified"]:
+                headers["If-Modified-Since"] = entry["last_modified"]
+
+        with self.session.get(url, headers=headers, timeout=self.timeout, stream=True) as response:
+            if response.status_code == 304:
+                print(f"♻️ [PDF CACHE] Not modified, reusing parsed {kind}: {url}")
+                if self.store is not None:
+                    self.store.touch(url, kind, entry["sha256"])
+                return copy.deepcopy(entry["parsed"][kind])
+            response.raise_for_status()
+
+            # Stream to a spooled file (spills to disk past spool_bytes), hashing as the chunks arrive
+            with tempfile.SpooledTemporaryFile(max_size=self.spool_bytes) as pdf_file:
+                sha = hashlib.sha256()
+                for chunk in response.iter_content(chunk_size=64 * 1024):
+                    sha.update(chunk)
+                    pdf_file.write(chunk)
+                digest = sha.hexdigest()
+
+                if entry and entry["sha256"] == digest and kind in entry["parsed"]:
+                    print(f"♻️ [PDF CACHE] Same bytes (sha256 {digest[:12]}), reusing parsed {kind}: {url}")
+                    result = entry["parsed"][kind]
+                else:
+                    pdf_file.seek(0)
+                    result = parse_fn(pdf_file)
+
+        with self._lock:
+            # New bytes invalidate everything parsed from the old ones
+            parsed = entry["parsed"] if entry and entry["sha256"] == digest else {}
+            parsed[kind] = result
+            self._entries[url] = {
+                "etag": response.headers.get("ETag"),
+                "last_modified": response.headers.get("Last-Modified"),
+                "sha256": digest,
+                "parsed": parsed,
+            }
+
+        if self.store is not None:
+            self.store.save(url, kind, digest, result, response.headers.get("ETag"), response.headers.get("Last-Modified"))
+
+        # Callers mutate what they get back (scores get merged into roster rows)
+        return copy.deepcopy(result)
+
+    def _load_stored(self, url, kind, entry):
+        stored = self.store.latest(url, kind)
+        if not stored:
+            return entry
+
+        with self._lock:
+            if entry and entry["sha256"] == stored["version"]:
+                entry["parsed"][kind] = stored["data"]
+            else:
+                entry = {
+                    "etag": stored.get("etag"),
+                    "last_modified": stored.get("last_modified"),
+                    "sha256": stored["version"],
+                    "parsed": {kind: stored["data"]},
+                }
+                self._entries[url] = entry
+        return entry
+
+    def version(self, url):
+        """SHA-256 of the last bytes seen at `url`, or None if it was never fetched."""
+        with self._lock:
+            entry = self._entries.get(url)
+            return entry["sha256"] if entry else None
@@ -0,0 +1,58 @@
+import hashlib
+import json
+import time
+import pymongo
+
+
+def content_version(data):
+    """Stable SHA-256 of parsed schedule data, for sources that don't give us one (HTML schedules)."""
+    return hashlib.sha256(json.dumps(data, sort_keys=True, default=str).encode()).hexdigest()
+
+
+class ScheduleStore:
+    """Parsed schedules persisted in MongoDB, one document per (schedule URL, kind, version).
+
+    kind is "roster" ({guard: row}) or "spots" ({class: finals spots}). Rosters are stored
+    as a list of rows because guard names can contain dots, which Mongo keys can't.
+    """
+
+    def __init__(self, collection):
+        self.collection = collection
+        self.collection.create_index(
+            [("url", pymongo.ASCENDING), ("kind", pymongo.ASCENDING), ("version", pymongo.ASCENDING)],
+            unique=True
+        )
+
+    def latest(self, url, kind):
+        """Most recently confirmed version for this URL, with `data` decoded, or None."""
+        doc = self.collection.find_one({"url": url, "kind": kind}, sort=[("checked_at", pymongo.DESCENDING)])
+        if doc:
+            doc["data"] = self._decode(kind, doc["data"])
+        return doc
+
+    def save(self, url, kind, version, data, etag=None, last_modified=None):
+        self.collection.update_one(
+            {"url": url, "kind": kind, "version": version},
+            {"$set": {
+                "data": self._encode(kind, data),
+                "etag": etag,
+                "last_modified": last_modified,
+                "checked_at": time.time()
+            }},
+            upsert=True
+        )
+
+    def touch(self, url, kind, version):
+        """Records that `version` is still what the URL serves."""
+        self.collection.update_one(
+            {"url": url, "kind": kind, "version": version},
+            {"$set": {"checked_at": time.time()}}
+        )
+
+    @staticmethod
+    def _encode(kind, data):
+        return list(data.values()) if kind == "roster" else data
+
+    @staticmethod
+    def _decode(kind, data):
+        return {row["Guard"]: row for row in data} if kind == "roster" else data
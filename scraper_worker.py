@@ -4,30 +4,71 @@ import time
 import pymongo
 import pandas as pd
 from bs4 import BeautifulSoup
-from playwright.sync_api import sync_playwright
+import threading
+from browser_pool import ThreadBrowserPools
+from page_ready import wait_stats
+from fetch_layer import PageFetcher
+from schedule_pdf import SchedulePdfCache, iter_pdf_lines, start_page_pool
+from schedule_store import ScheduleStore, content_version
+from command_queue import CommandQueue
+from guard_registry import GuardRegistry
+from finals_status import FinalsTracker, settle_final
+from simulator import SIMULATIONS, score_profile, simulate_advancement
 import streamlit as st 
 import re
-import requests
-import pdfplumber
-import io
 
 
 
-# Connect to MongoDB
-# 1. Look in the cloud first...
-mongo_url = os.environ.get("MONGO_URI")
-
-# 2. If we are on your desktop, just use the Streamlit secrets file!
-if not mongo_url:
-    mongo_url = st.secrets["MONGO_URI"]
-client = pymongo.MongoClient(mongo_url)
-db = client["rankings_2026"]
-national_collection = db["wgi_analytics"]
-live_collection = db["live_state"]
-command_collection = db["system_state"]
-
 USER_AGENT = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/121.0.0.0 Safari/537.36"
 
+# Set up by init_worker(). Nothing connects at import time, because spawned PDF page workers
+# import this module too (as __mp_main__) and only need schedule_pdf.
+client = db = None
+national_collection = live_collection = command_collection = archive_collection = None
+browser_pool = fetcher = guard_registry = schedule_store = schedule_pdfs = None
+
+def init_worker():
+    global client, db, national_collection, live_collection, command_collection, archive_collection
+    global browser_pool, fetcher, guard_registry, schedule_store, schedule_pdfs
+
+    # Connect to MongoDB
+    # 1. Look in the cloud first...
+    mongo_url = os.environ.get("MONGO_URI")
+
+    # 2. If we are on your desktop, just use the Streamlit secrets file!
+    if not mongo_url:
+        mongo_url = st.secrets["MONGO_URI"]
+    client = pymongo.MongoClient(mongo_url)
+    db = client["rankings_2026"]
+    national_collection = db["wgi_analytics"]
+    # Season averages are looked up by Guard + Class
+    national_collection.create_index([("Guard", pymongo.ASCENDING), ("Class", pymongo.ASCENDING)])
+    live_collection = db["live_state"]
+    command_collection = db["system_state"]
+    # One leaderboard per ShowId; documents marked final are never scraped again
+    archive_collection = db["archive_state"]
+    archive_collection.create_index([("type", pymongo.ASCENDING), ("show_id", pymongo.ASCENDING)], unique=True)
+
+    # One long-lived Chromium per worker thread (launched lazily, relaunched if it crashes)
+    browser_pool = ThreadBrowserPools(USER_AGENT)
+    # Plain HTTP first, Chromium only when a page needs JavaScript to render
+    fetcher = PageFetcher(browser_pool, USER_AGENT)
+    # Schedules, CompetitionSuite and WGI scores spell guards differently; everything goes through this
+    guard_registry = GuardRegistry(db["guard_registry"])
+    # Parsed rosters / finals spots per schedule URL and version, shared by resyncs and restarts
+    schedule_store = ScheduleStore(db["schedule_store"])
+    # Schedule PDFs rarely change mid-show, so only re-parse them when their bytes do
+    schedule_pdfs = SchedulePdfCache(USER_AGENT, store=schedule_store)
+
+# How often a command lane polls when the server can't push commands over a change stream
+COMMAND_POLL_SECONDS = int(os.environ.get("WGI_COMMAND_POLL_SECONDS", "2"))
+# Processes used to extract schedule PDF pages in parallel (0 or 1 parses on the calling thread)
+PDF_PAGE_WORKERS = int(os.environ.get("WGI_PDF_PAGE_WORKERS", "0"))
+# How long a stored schedule is trusted before a resync re-checks it for changes
+SCHEDULE_RECHECK_SECONDS = int(os.environ.get("WGI_SCHEDULE_RECHECK_SECONDS", "1800"))
+# How long a non-live lane keeps its Chromium warm after its last command
+LANE_BROWSER_IDLE_SECONDS = int(os.environ.get("WGI_LANE_BROWSER_IDLE_SECONDS", "600"))
+
 def clean_class_name(raw_class):
     """Strips out WGI round/prelim/finals tags to keep classes unified."""
     clean = raw_class.strip()
@@ -43,111 +84,108 @@ def clean_class_name(raw_class):
     # Fallback just in case aggressive stripping leaves an empty string
     return clean.strip() if clean.strip() else "Scholastic A"
 
+# How many event pages Hop 2 fetches side by side
+HOP2_CONCURRENCY = int(os.environ.get("WGI_HOP2_CONCURRENCY", "6"))
+
+def extract_schedule_links(html):
+    """Finds the main (non Regional A) prelims and finals schedule links on a WGI event page."""
+    p_url = ""
+    f_url = ""
+    soup = BeautifulSoup(html, 'html.parser')
+    for a in soup.find_all('a', href=True):
+        link_text = a.get_text(strip=True).lower()
+        href = a['href']
+        if "prelims" in link_text and "regional a" not in link_text and not p_url:
+            p_url = href
+        elif "finals" in link_text and "regional a" not in link_text and not f_url:
+            f_url = href
+    return p_url, f_url
+
 # --- 1. THE NATIONAL LEDGER & ZERO-TOUCH DISCOVERY ENGINE ---
 def scrape_national_scores():
     print("🚀 [WORKER] Running Zero-Touch Discovery (Calendar -> Details -> Scores)...")
     master_events = {} 
 
-    with sync_playwright() as p:
-        browser = p.chromium.launch(
-            headless=True, 
-            args=["--disable-blink-features=AutomationControlled"]
-        )
-        context = browser.new_context(user_agent=USER_AGENT)
-        page = context.new_page()
-
-        # --- HOP 1: GET EVENT DETAILS LINKS FROM CALENDAR ---
-        print("🗓️ Hop 1: Hunting for Event Pages on WGI Calendar...")
-        details_links = {}
-        try:
-            page.goto("https://www.wgi.org/color-guard/cg-calendar/")
-            page.wait_for_timeout(5000)
+    # --- HOP 1: GET EVENT DETAILS LINKS FROM CALENDAR ---
+    print("🗓️ Hop 1: Hunting for Event Pages on WGI Calendar...")
+    details_links = {}
+    try:
+        html = fetcher.fetch("https://www.wgi.org/color-guard/cg-calendar/", "calendar")
+        
+        soup = BeautifulSoup(html or "", 'html.parser')
+        for link in soup.find_all('a', href=re.compile(r'event-details-page')):
+            href = link['href']
+            event_name = "Unknown Event"
+            parent = link.find_parent(['div', 'li', 'article', 'td'])
+            if parent:
+                header = parent.find(['h2', 'h3', 'h4', 'strong', 'span'])
+                if header:
+                    event_name = header.get_text(strip=True)
             
-            soup = BeautifulSoup(page.content(), 'html.parser')
-            for link in soup.find_all('a', href=re.compile(r'event-details-page')):
-                href = link['href']
-                event_name = "Unknown Event"
-                parent = link.find_parent(['div', 'li', 'article', 'td'])
-                if parent:
-                    header = parent.find(['h2', 'h3', 'h4', 'strong', 'span'])
-                    if header:
-                        event_name = header.get_text(strip=True)
+            clean_name = event_name.split(",")[0].replace("Regional", "").strip()
+            full_url = href if href.startswith('http') else f"https://www.wgi.org{href}"
+            details_links[clean_name] = full_url
+            
+        print(f"✅ Found {len(details_links)} Event Details pages.")
+    except Exception as e:
+        print(f"⚠️ [WORKER] Calendar Scrape Error: {e}")
+
+    # --- HOP 2: SCAN EVENT PAGES FOR SCHEDULE URLS ---
+    print(f"🔍 Hop 2: Scanning Event Pages for Schedule Links ({HOP2_CONCURRENCY} at a time)...")
+    event_items = list(details_links.items())
+    event_pages = fetcher.fetch_many([url for _, url in event_items], "event_page", HOP2_CONCURRENCY)
+
+    # Merge in calendar order so event_metadata comes out the same as a serial scan
+    for (event_name, event_url), html in zip(event_items, event_pages):
+        print(f"  -> Scanning Event Page: {event_name}...")
+        p_url = ""
+        f_url = ""
+        if html:
+            p_url, f_url = extract_schedule_links(html)
+            if p_url: print(f"      🔗 Found Main Prelims: {p_url}")
+            if f_url: print(f"      🔗 Found Main Finals: {f_url}")
+        
+        # THE FIX: Save the URLs to the dictionary so they survive Hop 3!
+        master_events[event_name] = {
+            "name": event_name,
+            "p_url": p_url,
+            "f_url": f_url,
+            "show_id": ""
+        }
+
+    # --- HOP 3: WGI SCORES FOR SHOW IDs ---
+    print("🔍 Hop 3: Hunting for ShowIDs on WGI Scores Page...")
+    try:
+        html = fetcher.fetch("https://www.wgi.org/scores/color-guard-scores/", "scores_index")
+        
+        soup = BeautifulSoup(html or "", 'html.parser')
+        for link in soup.find_all('a', href=True):
+            href = link['href']
+            if 'ShowId=' in href:
+                show_name = link.get_text(strip=True)
+                if not show_name or "View" in show_name or "Score" in show_name:
+                    row = link.find_parent('tr')
+                    if row:
+                        cols = row.find_all('td')
+                        if len(cols) > 0:
+                            show_name = cols[0].get_text(strip=True)
                 
-                clean_name = event_name.split(",")[0].replace("Regional", "").strip()
-                full_url = href if href.startswith('http') else f"https://www.wgi.org{href}"
-                details_links[clean_name] = full_url
+                clean_score_name = show_name.split("Regional")[0].strip() if show_name else "Unknown Event"
+                extracted_id = href.split("ShowId=")[-1]
                 
-            print(f"✅ Found {len(details_links)} Event Details pages.")
-        except Exception as e:
-            print(f"⚠️ [WORKER] Calendar Scrape Error: {e}")
-
-        # --- HOP 2: SCAN EVENT PAGES FOR SCHEDULE URLS ---
-        print("🔍 Hop 2: Scanning Event Pages for Schedule Links...")
-        for event_name, event_url in details_links.items():
-            print(f"  -> Scanning Event Page: {event_name}...")
-            p_url = ""
-            f_url = ""
-            try:
-                page.goto(event_url)
-                page.wait_for_timeout(5000) 
-                soup = BeautifulSoup(page.content(), 'html.parser')
+                matched = False
+                for key in master_events.keys():
+                    if clean_score_name.lower() in key.lower() or key.lower() in clean_score_name.lower():
+                        master_events[key]["show_id"] = extracted_id
+                        matched = True
+                        break
                 
-                for a in soup.find_all('a', href=True):
-                    link_text = a.get_text(strip=True).lower()
-                    href = a['href']
-                    if "prelims" in link_text and "regional a" not in link_text and not p_url:
-                        p_url = href
-                        print(f"      🔗 Found Main Prelims: {p_url}")
-                    elif "finals" in link_text and "regional a" not in link_text and not f_url:
-                        f_url = href
-                        print(f"      🔗 Found Main Finals: {f_url}")
-            except Exception as e:
-                print(f"⚠️ [WORKER] Error scanning {event_name}: {e}")
-            
-            # THE FIX: Save the URLs to the dictionary so they survive Hop 3!
-            master_events[event_name] = {
-                "name": event_name,
-                "p_url": p_url,
-                "f_url": f_url,
-                "show_id": ""
-            }
-
-        # --- HOP 3: WGI SCORES FOR SHOW IDs ---
-        print("🔍 Hop 3: Hunting for ShowIDs on WGI Scores Page...")
-        try:
-            page.goto("https://www.wgi.org/scores/color-guard-scores/")
-            page.wait_for_timeout(5000) 
-            
-            soup = BeautifulSoup(page.content(), 'html.parser')
-            for link in soup.find_all('a', href=True):
-                href = link['href']
-                if 'ShowId=' in href:
-                    show_name = link.get_text(strip=True)
-                    if not show_name or "View" in show_name or "Score" in show_name:
-                        row = link.find_parent('tr')
-                        if row:
-                            cols = row.find_all('td')
-                            if len(cols) > 0:
-                                show_name = cols[0].get_text(strip=True)
-                    
-                    clean_score_name = show_name.split("Regional")[0].strip() if show_name else "Unknown Event"
-                    extracted_id = href.split("ShowId=")[-1]
-                    
-                    matched = False
-                    for key in master_events.keys():
-                        if clean_score_name.lower() in key.lower() or key.lower() in clean_score_name.lower():
-                            master_events[key]["show_id"] = extracted_id
-                            matched = True
-                            break
+                if not matched:
+                     master_events[clean_score_name] = {"name": clean_score_name, "show_id": extracted_id, "p_url": "", "f_url": ""}
                     
-                    if not matched:
-                         master_events[clean_score_name] = {"name": clean_score_name, "show_id": extracted_id, "p_url": "", "f_url": ""}
-                        
-            print(f"✅ Successfully mapped ShowIDs to the master dictionary.")
-        except Exception as e:
-             print(f"⚠️ [WORKER] Scores Scrape Error: {e}")
-
-        browser.close()
+        print(f"✅ Successfully mapped ShowIDs to the master dictionary.")
+    except Exception as e:
+         print(f"⚠️ [WORKER] Scores Scrape Error: {e}")
 
     # --- FINAL DB UPDATE ---
     event_metadata_list = list(master_events.values())
@@ -171,6 +209,14 @@ def scrape_national_scores():
 def parse_pdf_schedule(pdf_url, combined_data):
     print(f"📄 [TRAFFIC COP] Running Ultimate PDF Parser: {pdf_url}")
     
+    try:
+        # Only re-downloads and re-parses when the PDF actually changed
+        combined_data.update(schedule_pdfs.fetch_parsed(pdf_url, "roster", read_pdf_roster))
+    except Exception as e:
+        print(f"⚠️ [WORKER] PDF Parser Failed: {e}")
+
+def iter_pdf_roster(pdf_file):
+    """Yields prelims roster rows from a schedule PDF, reading one page at a time."""
     class_map = {
         "SRA": "Scholastic Regional A",
         "SA": "Scholastic A",
@@ -182,68 +228,61 @@ def parse_pdf_schedule(pdf_url, combined_data):
         "IW": "Independent World"
     }
     
-    try:
-        response = requests.get(pdf_url)
-        with pdfplumber.open(io.BytesIO(response.content)) as pdf:
-            for page in pdf.pages:
-                text = page.extract_text()
-                if not text: continue
+    for line in iter_pdf_lines(pdf_file):
+        if len(line) < 5: continue
+            
+        match = re.search(r'^(.*?)\s+(SRA|SA|SO|SW|IRA|IA|IO|IW)(?:\s*-\s*ROUND\D*(\d+))?\s+(\d{1,2}:\d{2}\s*[AP]M)$', line, re.IGNORECASE)
+        
+        if match:
+            raw_front_text = match.group(1).strip()
+            base_abbr = match.group(2).upper()
+            round_num = match.group(3) 
+            time_str = match.group(4).strip()
+            
+            if ',' in raw_front_text:
+                before_comma = raw_front_text.rsplit(',', 1)[0].strip()
+                before_comma = re.sub(r'\(\w{2}\)', '', before_comma).strip()
+                before_comma = re.sub(r'\b\d{5}\b', '', before_comma).strip()
                 
-                for line in text.split('\n'):
-                    line = line.strip()
-                    
-                    if len(line) < 5: continue
-                        
-                    match = re.search(r'^(.*?)\s+(SRA|SA|SO|SW|IRA|IA|IO|IW)(?:\s*-\s*ROUND\D*(\d+))?\s+(\d{1,2}:\d{2}\s*[AP]M)$', line, re.IGNORECASE)
-                    
-                    if match:
-                        raw_front_text = match.group(1).strip()
-                        base_abbr = match.group(2).upper()
-                        round_num = match.group(3) 
-                        time_str = match.group(4).strip()
-                        
-                        if ',' in raw_front_text:
-                            before_comma = raw_front_text.rsplit(',', 1)[0].strip()
-                            before_comma = re.sub(r'\(\w{2}\)', '', before_comma).strip()
-                            before_comma = re.sub(r'\b\d{5}\b', '', before_comma).strip()
-                            
-                            school_pattern = re.search(
-                                r'^(.*?(?:High School|HS|Academy|Winterguard|WG|Independent|Performing Arts|Visual Productions|Nuance\s+\w+)(?:\s+(?:JV|Varsity|[A-Z]))?)',
-                                before_comma, re.IGNORECASE
-                            )
-                            if school_pattern:
-                                guard_name = school_pattern.group(1).strip()
-                            else:
-                                guard_name = before_comma.rsplit(' ', 1)[0].strip()
-                        else:
-                            guard_name = raw_front_text
-
-                        # Strip leading stray single capital letter (e.g. "DEast" -> "East")
-                        guard_name = re.sub(r'^[A-Z](?=[A-Z])', '', guard_name).strip()
-                        # Strip leading stray digits
-                        guard_name = re.sub(r'^\d+\s+', '', guard_name).strip()
-                        # Strip trailing truncation artifacts
-                        guard_name = re.sub(r'\s+from\s+\w+…?$', '', guard_name, flags=re.IGNORECASE).strip()
-                        
-                        # Build the full class name
-                        base_clean = clean_class_name(class_map.get(base_abbr, base_abbr))
-                        
-                        if round_num:
-                            g_class = f"{base_clean} - Round {round_num}"
-                        else:
-                            g_class = base_clean
-                        
-                        combined_data[guard_name] = {
-                            "Guard": guard_name, "Class": g_class, 
-                            "Prelims Time": time_str, "Prelims Score": 0.0,
-                            "Finals Time": "", "Finals Score": 0.0
-                        }
-                        print(f"➕ Found Guard: {guard_name} ({g_class}) @ {time_str}")
-                       
-    except Exception as e:
-        print(f"⚠️ [WORKER] PDF Parser Failed: {e}")
+                school_pattern = re.search(
+                    r'^(.*?(?:High School|HS|Academy|Winterguard|WG|Independent|Performing Arts|Visual Productions|Nuance\s+\w+)(?:\s+(?:JV|Varsity|[A-Z]))?)',
+                    before_comma, re.IGNORECASE
+                )
+                if school_pattern:
+                    guard_name = school_pattern.group(1).strip()
+                else:
+                    guard_name = before_comma.rsplit(' ', 1)[0].strip()
+            else:
+                guard_name = raw_front_text
+
+            # Strip leading stray single capital letter (e.g. "DEast" -> "East")
+            guard_name = re.sub(r'^[A-Z](?=[A-Z])', '', guard_name).strip()
+            # Strip leading stray digits
+            guard_name = re.sub(r'^\d+\s+', '', guard_name).strip()
+            # Strip trailing truncation artifacts
+            guard_name = re.sub(r'\s+from\s+\w+…?$', '', guard_name, flags=re.IGNORECASE).strip()
+            guard_name = guard_registry.canonical(guard_name, source="pdf")
+            
+            # Build the full class name
+            base_clean = clean_class_name(class_map.get(base_abbr, base_abbr))
+            
+            if round_num:
+                g_class = f"{base_clean} - Round {round_num}"
+            else:
+                g_class = base_clean
+            
+            print(f"➕ Found Guard: {guard_name} ({g_class}) @ {time_str}")
+            yield {
+                "Guard": guard_name, "Class": g_class, 
+                "Prelims Time": time_str, "Prelims Score": 0.0,
+                "Finals Time": "", "Finals Score": 0.0
+            }
+
+def read_pdf_roster(pdf_file):
+    """Parses a prelims schedule PDF into {guard_name: roster row}."""
+    return {row["Guard"]: row for row in iter_pdf_roster(pdf_file)}
 
-def parse_html_schedule(html_url, combined_data, page):
+def parse_html_schedule(html_url, combined_data):
     print(f"📡 [TRAFFIC COP] Routing to HTML Parser: {html_url}")
     
     class_map = {
@@ -258,11 +297,12 @@ def parse_html_schedule(html_url, combined_data, page):
     }
     
     try:
-        page.goto(html_url)
-        page.wait_for_timeout(5000)
-        page.wait_for_selector(".schedule-row", timeout=15000)
+        html = fetcher.fetch(html_url, "schedule")
+        if not html:
+            print(f"⚠️ [WORKER] No schedule rows rendered at {html_url}")
+            return
         
-        soup = BeautifulSoup(page.content(), 'html.parser')
+        soup = BeautifulSoup(html, 'html.parser')
         
         for row in soup.find_all('div', class_='schedule-row'):
             # Skip breaks and custom rows
@@ -276,7 +316,7 @@ def parse_html_schedule(html_url, combined_data, page):
             if not name_div or not initials_div or not time_div:
                 continue
             
-            guard_name = name_div.get_text(strip=True)
+            guard_name = guard_registry.canonical(name_div.get_text(strip=True), source="schedule")
             raw_initials = initials_div.get_text(strip=True)  # e.g. "SA - Round 1"
             time_str = time_div.get_text(strip=True)
             
@@ -308,39 +348,39 @@ def parse_html_schedule(html_url, combined_data, page):
 
 def count_pdf_finals_spots(pdf_url, class_spots):
     print(f"📄 [TRAFFIC COP] Routing to PDF Finals Spot Counter: {pdf_url}")
+    try:
+        for g_class, spots in schedule_pdfs.fetch_parsed(pdf_url, "spots", read_pdf_finals_spots).items():
+            class_spots[g_class] = class_spots.get(g_class, 0) + spots
+    except Exception as e:
+        print(f"⚠️ [WORKER] PDF Finals Parser Failed: {e}")
+
+def read_pdf_finals_spots(pdf_file):
+    """Counts finals performance slots per class in a finals schedule PDF."""
     class_map = {
         "SRA": "Scholastic Regional A", "SA": "Scholastic A",
         "SO": "Scholastic Open", "SW": "Scholastic World",
         "IRA": "Independent Regional A", "IA": "Independent A",
         "IO": "Independent Open", "IW": "Independent World"
     }
-    try:
-        response = requests.get(pdf_url)
-        with pdfplumber.open(io.BytesIO(response.content)) as pdf:
-            for page in pdf.pages:
-                text = page.extract_text()
-                if not text: continue
-                
-                for line in text.split('\n'):
-                    line = line.strip()
-                    if len(line) < 5: continue
-                    
-                    # Regex: Just look for the abbreviation and a Time at the end of the line
-                    match = re.search(r'(SRA|SA|SO|SW|IRA|IA|IO|IW)\s+(\d{1,2}:\d{2}\s*[AP]M)$', line, re.IGNORECASE)
-                    if match:
-                        base_abbr = match.group(1).upper()
-                        full_class = class_map.get(base_abbr, base_abbr)
-                        g_class = clean_class_name(full_class)
-                        
-                        # Add 1 to the counter for this class
-                        class_spots[g_class] = class_spots.get(g_class, 0) + 1
-                        print(f"🎯 Finals Spot Found: {g_class} (Total so far: {class_spots[g_class]})")
-                        
-    except Exception as e:
-        print(f"⚠️ [WORKER] PDF Finals Parser Failed: {e}")
+    class_spots = {}
+    for line in iter_pdf_lines(pdf_file):
+        if len(line) < 5: continue
+        
+        # Regex: Just look for the abbreviation and a Time at the end of the line
+        match = re.search(r'(SRA|SA|SO|SW|IRA|IA|IO|IW)\s+(\d{1,2}:\d{2}\s*[AP]M)$', line, re.IGNORECASE)
+        if match:
+            base_abbr = match.group(1).upper()
+            full_class = class_map.get(base_abbr, base_abbr)
+            g_class = clean_class_name(full_class)
+            
+            # Add 1 to the counter for this class
+            class_spots[g_class] = class_spots.get(g_class, 0) + 1
+            print(f"🎯 Finals Spot Found: {g_class} (Total so far: {class_spots[g_class]})")
+
+    return class_spots
 
 
-def count_html_finals_spots(html_url, class_spots, page):
+def count_html_finals_spots(html_url, class_spots):
     print(f"📡 [TRAFFIC COP] Routing to HTML Finals Spot Counter: {html_url}")
     
     class_map = {
@@ -355,11 +395,12 @@ def count_html_finals_spots(html_url, class_spots, page):
     }
     
     try:
-        page.goto(html_url)
-        page.wait_for_timeout(5000)
-        page.wait_for_selector(".schedule-row", timeout=15000)
+        html = fetcher.fetch(html_url, "schedule")
+        if not html:
+            print(f"⚠️ [WORKER] No schedule rows rendered at {html_url}")
+            return
         
-        soup = BeautifulSoup(page.content(), 'html.parser')
+        soup = BeautifulSoup(html, 'html.parser')
         
         for row in soup.find_all('div', class_='schedule-row'):
             if 'schedule-row--custom' in row.get('class', []):
@@ -380,210 +421,314 @@ def count_html_finals_spots(html_url, class_spots, page):
         print(f"⚠️ [WORKER] HTML Finals Parser Failed: {e}")
 
 
-# --- 2. THE LIVE SHOW SCRAPER (The Orchestrator) ---
-def scrape_live_show(show_id, prelims_url, finals_url):
-    print(f"🚀 [WORKER] Running Hybrid Live Scrape...")
-    combined_data = {}
-    class_spots = {}
-    
-    with sync_playwright() as p:
-        browser = p.chromium.launch(headless=True)
-        context = browser.new_context(user_agent=USER_AGENT)
-        page = context.new_page()
-
-        # --- PASS 1: PRELIMS SCHEDULE (The Traffic Cop) ---
+# --- STORED SCHEDULES (Passes 1 & 2) ---
+def stored_schedule(url, kind, refresh):
+    """Returns the stored parse of `url` if it's fresh enough to skip re-checking, else None."""
+    if refresh or not url:
+        return None
+    stored = schedule_store.latest(url, kind)
+    if stored and time.time() - stored.get("checked_at", 0) < SCHEDULE_RECHECK_SECONDS:
+        print(f"♻️ [SCHEDULE] Reusing stored {kind} (version {stored['version'][:12]}): {url}")
+        return stored["data"]
+    return None
+
+def save_html_schedule(url, kind, data):
+    # PDFs are saved by SchedulePdfCache with their byte hash; HTML gets a hash of what we parsed
+    if data and not url.lower().endswith('.pdf'):
+        schedule_store.save(url, kind, content_version(data), data)
+
+def load_show_schedule(prelims_url, finals_url, refresh=True):
+    """Returns (roster, class_spots) for a show.
+
+    With refresh=False, a recently checked stored schedule is used as-is and nothing is fetched.
+    """
+    combined_data = stored_schedule(prelims_url, "roster", refresh)
+    class_spots = stored_schedule(finals_url, "spots", refresh)
+
+    # --- PASS 1: PRELIMS SCHEDULE (The Traffic Cop) ---
+    if combined_data is None:
+        combined_data = {}
         if prelims_url:
             if prelims_url.lower().endswith('.pdf'):
                 parse_pdf_schedule(prelims_url, combined_data)
             else:
-                parse_html_schedule(prelims_url, combined_data, page)
+                parse_html_schedule(prelims_url, combined_data)
+            save_html_schedule(prelims_url, "roster", combined_data)
 
-        # --- PASS 2: FINALS SPOT COUNTER (The Traffic Cop) ---
+    # --- PASS 2: FINALS SPOT COUNTER (The Traffic Cop) ---
+    if class_spots is None:
+        class_spots = {}
         if finals_url:
             if finals_url.lower().endswith('.pdf'):
                 count_pdf_finals_spots(finals_url, class_spots)
             else:
-                count_html_finals_spots(finals_url, class_spots, page)
-
-        # --- PASS 3: WGI SCORES (The Ultimate Source of Truth) ---
-        if show_id and str(show_id).strip() != "":
-            wgi_url = f"https://www.wgi.org/scores/color-guard-score-event/?ShowId={show_id}"
-            print(f"📡 Probing WGI Scores: {wgi_url}")
-            try:
-                page.goto(wgi_url)
-                page.wait_for_timeout(4000)
-                
-                soup = BeautifulSoup(page.content(), 'html.parser')
-                for table in soup.find_all('table'):
-                    raw_class = "Unknown Class"
-                    for row in table.find_all('tr'):
-                        th_cells = row.find_all('th')
-                        if th_cells:
-                            if len(th_cells) == 1: raw_class = th_cells[0].get_text(strip=True)
-                            elif row.find(['th', 'td'], class_='division-name'):
-                                raw_class = row.find(['th', 'td'], class_='division-name').get_text(strip=True)
-                            continue 
-                        
-                        cols = row.find_all('td')
-                        if len(cols) >= 3:
-                            team_name = cols[1].get_text(strip=True)
-                            score_text = cols[2].get_text(strip=True).upper().replace("VIEW RECAP", "").strip()
-                            
-                            try: score = float(score_text)
-                            except ValueError: continue
-                            if not team_name: continue
-
-                            base_class = clean_class_name(raw_class)
-                            
-                            # If guard isn't in schedule (e.g. past event or schedule failed), add them!
-                            if team_name not in combined_data:
-                                combined_data[team_name] = {
-                                    "Guard": team_name, "Class": base_class, 
-                                    "Prelims Time": "Finished", "Prelims Score": 0.0,
-                                    "Finals Time": "", "Finals Score": 0.0
-                                }
-                            
-                            # Inject score and replace time
-                            if "Final" in raw_class or "Finals" in raw_class:
-                                combined_data[team_name]["Finals Score"] = score
-                                combined_data[team_name]["Finals Time"] = "✅" 
-                            else:
-                                combined_data[team_name]["Prelims Score"] = score
-                                combined_data[team_name]["Prelims Time"] = "✅"
-            except Exception as e:
-                print(f"⚠️ [WORKER] WGI Scrape Error: {e}")
-
-        browser.close()
+                count_html_finals_spots(finals_url, class_spots)
+            save_html_schedule(finals_url, "spots", class_spots)
 
-    final_list = list(combined_data.values())
-    if final_list:
-        live_collection.update_one(
-            {"type": "current_session"}, 
-            {"$set": {"data": final_list, "spots": class_spots}}, 
-            upsert=True
-        )
-        print(f"✅ [WORKER] Updated Live Show with {len(final_list)} guards.")
-    else:
-        print("❌ [WORKER] Live scrape finished, but no data was found.")
+    return combined_data, class_spots
 
-# --- 3. THE PAST EVENTS ARCHIVE SCRAPER ---
-def scrape_archive(show_id, event_name):
-    print(f"📦 [WORKER] Pulling Archive Scores for {event_name} (ShowID: {show_id})...")
-    archive_data = []
-    
-    with sync_playwright() as p:
-        browser = p.chromium.launch(headless=True)
-        context = browser.new_context(user_agent=USER_AGENT)
-        page = context.new_page()
 
+# --- 2. THE LIVE SHOW SCRAPER (The Orchestrator) ---
+def scrape_live_show(show_id, prelims_url, finals_url, refresh_schedule=True):
+    print(f"🚀 [WORKER] Running Hybrid Live Scrape...")
+    # Passes 1 & 2 come from the schedule store unless asked to re-check the schedule
+    combined_data, class_spots = load_show_schedule(prelims_url, finals_url, refresh_schedule)
+
+    # --- PASS 3: WGI SCORES (The Ultimate Source of Truth) ---
+    if show_id and str(show_id).strip() != "":
         wgi_url = f"https://www.wgi.org/scores/color-guard-score-event/?ShowId={show_id}"
+        print(f"📡 Probing WGI Scores: {wgi_url}")
         try:
-            page.goto(wgi_url)
-            page.wait_for_timeout(5000) # Wait 5 seconds for Salesforce to load the tables!
-            
-            soup = BeautifulSoup(page.content(), 'html.parser')
-            current_class = "Unknown Class"
+            html = fetcher.fetch(wgi_url, "score_event")
             
+            soup = BeautifulSoup(html or "", 'html.parser')
             for table in soup.find_all('table'):
+                raw_class = "Unknown Class"
                 for row in table.find_all('tr'):
                     th_cells = row.find_all('th')
                     if th_cells:
-                        if len(th_cells) == 1: 
-                            current_class = th_cells[0].get_text(strip=True)
+                        if len(th_cells) == 1: raw_class = th_cells[0].get_text(strip=True)
                         elif row.find(['th', 'td'], class_='division-name'):
-                            current_class = row.find(['th', 'td'], class_='division-name').get_text(strip=True)
+                            raw_class = row.find(['th', 'td'], class_='division-name').get_text(strip=True)
                         continue 
                     
                     cols = row.find_all('td')
                     if len(cols) >= 3:
-                        team = cols[1].get_text(strip=True)
+                        team_name = cols[1].get_text(strip=True)
                         score_text = cols[2].get_text(strip=True).upper().replace("VIEW RECAP", "").strip()
                         
                         try: score = float(score_text)
                         except ValueError: continue
+                        if not team_name: continue
+                        team_name = guard_registry.canonical(team_name, source="scores")
+
+                        base_class = clean_class_name(raw_class)
+                        
+                        # If guard isn't in schedule (e.g. past event or schedule failed), add them!
+                        if team_name not in combined_data:
+                            combined_data[team_name] = {
+                                "Guard": team_name, "Class": base_class, 
+                                "Prelims Time": "Finished", "Prelims Score": 0.0,
+                                "Finals Time": "", "Finals Score": 0.0
+                            }
                         
-                        if team:
-                            archive_data.append({
-                                "Guard": team,
-                                "Class": clean_class_name(current_class), # Ensure names match
-                                "Final Score": score
-                            })
+                        # Inject score and replace time
+                        if "Final" in raw_class or "Finals" in raw_class:
+                            combined_data[team_name]["Finals Score"] = score
+                            combined_data[team_name]["Finals Time"] = "✅" 
+                        else:
+                            combined_data[team_name]["Prelims Score"] = score
+                            combined_data[team_name]["Prelims Time"] = "✅"
         except Exception as e:
-            print(f"⚠️ [WORKER] Archive Scrape Error: {e}")
+            print(f"⚠️ [WORKER] WGI Scrape Error: {e}")
 
-        browser.close()
 
+    final_list = list(combined_data.values())
+    if final_list:
+        write_live_state(final_list, class_spots)
+    else:
+        print("❌ [WORKER] Live scrape finished, but no data was found.")
+
+def write_live_state(final_list, class_spots):
+    """Writes only what changed since the last sync, bumping `version` and `hash` when anything did."""
+    digest = content_version({"data": final_list, "spots": class_spots})
+    prev = live_collection.find_one({"type": "current_session"})
+    if prev and prev.get("hash") == digest:
+        print(f"✅ [WORKER] Live Show unchanged ({len(final_list)} guards), skipped write.")
+        return
+
+    header = {"hash": digest, "version": (prev.get("version") or 0) + 1 if prev else 1, "updated_at": time.time()}
+
+    # Same guards in the same order: patch just the rows that changed
+    old_rows = prev.get("data", []) if prev else []
+    if prev and [row.get("Guard") for row in old_rows] == [row["Guard"] for row in final_list]:
+        changes = {f"data.{i}": row for i, (old, row) in enumerate(zip(old_rows, final_list)) if old != row}
+        if prev.get("spots") != class_spots:
+            changes["spots"] = class_spots
+        # Only lands if nobody else wrote since we read it
+        result = live_collection.update_one(
+            {"_id": prev["_id"], "version": prev.get("version")},
+            {"$set": {**header, **changes}}
+        )
+        if result.matched_count:
+            print(f"✅ [WORKER] Updated Live Show: {len(changes)} changed fields (version {header['version']}).")
+            return
+
+    live_collection.update_one(
+        {"type": "current_session"}, 
+        {"$set": {"data": final_list, "spots": class_spots, **header}}, 
+        upsert=True
+    )
+    print(f"✅ [WORKER] Updated Live Show with {len(final_list)} guards (version {header['version']}).")
+
+# --- 3. THE PAST EVENTS ARCHIVE SCRAPER ---
+def parse_archive_scores(html):
+    """Returns ([{Guard, Class, Final Score}], finals_complete) from a WGI score event page."""
+    archive_data = []
+    finals = FinalsTracker()
+
+    soup = BeautifulSoup(html or "", 'html.parser')
+    current_class = "Unknown Class"
+    
+    for table in soup.find_all('table'):
+        for row in table.find_all('tr'):
+            th_cells = row.find_all('th')
+            if th_cells:
+                if len(th_cells) == 1: 
+                    current_class = th_cells[0].get_text(strip=True)
+                elif row.find(['th', 'td'], class_='division-name'):
+                    current_class = row.find(['th', 'td'], class_='division-name').get_text(strip=True)
+                continue 
+            
+            cols = row.find_all('td')
+            if len(cols) >= 3:
+                team = cols[1].get_text(strip=True)
+                score_text = cols[2].get_text(strip=True).upper().replace("VIEW RECAP", "").strip()
+                
+                try: score = float(score_text)
+                except ValueError: continue
+                
+                if team:
+                    team = guard_registry.canonical(team, source="scores")
+                    finals.add(current_class, clean_class_name(current_class))
+                    archive_data.append({
+                        "Guard": team,
+                        "Class": clean_class_name(current_class), # Ensure names match
+                        "Final Score": score
+                    })
+
+    return archive_data, finals.complete
+
+def save_archive(show_id, event_name, archive_data, finals_complete, cached):
     if archive_data:
         # Sort highest scores to the top, grouped by class
         archive_data = sorted(archive_data, key=lambda x: (x["Class"], -x["Final Score"]))
-        db["archive_state"].update_one(
-            {"type": "current_archive"}, 
-            # THE FIX: Added "status": "complete"
-            {"$set": {"event_name": event_name, "show_id": show_id, "data": archive_data, "status": "complete"}}, 
+        now = time.time()
+        unchanged = bool(cached and cached.get("data") == archive_data)
+        final, changed_at = settle_final(
+            finals_complete, unchanged, cached and (cached.get("changed_at") or cached.get("scraped_at")), now
+        )
+        archive_collection.update_one(
+            {"type": "archive", "show_id": show_id}, 
+            {"$set": {
+                "event_name": event_name, "data": archive_data, "status": "complete",
+                "final": final, "scraped_at": now, "changed_at": changed_at
+            }}, 
             upsert=True
         )
-        print(f"✅ [WORKER] Successfully archived {len(archive_data)} scores for {event_name}.")
+        print(f"✅ [WORKER] Successfully archived {len(archive_data)} scores for {event_name}{' (final)' if final else ''}.")
     else:
         # THE FIX: Tell Streamlit we failed so it stops spinning
-        db["archive_state"].update_one(
-            {"type": "current_archive"}, 
-            {"$set": {"status": "empty", "event_name": event_name}}
+        archive_collection.update_one(
+            {"type": "archive", "show_id": show_id}, 
+            {"$set": {"status": "empty" if not cached else "complete", "event_name": event_name}},
+            upsert=True
         )
-        print("❌ [WORKER] Archive finished, but no scores were found.")
+        print(f"❌ [WORKER] Archive finished, but no scores were found for {event_name}.")
+
+def scrape_archive(show_id, event_name, force=False):
+    """Scrapes one event's leaderboard. Final archives are served from cache unless `force` is set."""
+    cached = archive_collection.find_one(
+        {"type": "archive", "show_id": show_id}, {"final": 1, "data": 1, "scraped_at": 1, "changed_at": 1}
+    )
+    if cached and cached.get("final") and not force:
+        archive_collection.update_one({"_id": cached["_id"]}, {"$set": {"status": "complete"}})
+        print(f"♻️ [WORKER] {event_name} is final, serving cached archive (ShowID: {show_id}).")
+        return
 
-def scrape_projection(show_name, prelims_url, finals_url):
-    print(f"🔮 [WORKER] Building Projection for: {show_name}...")
-    combined_data = {}
-    class_spots = {}
+    print(f"📦 [WORKER] Pulling Archive Scores for {event_name} (ShowID: {show_id})...")
+    archive_data, finals_complete = [], False
 
-    with sync_playwright() as p:
-        browser = p.chromium.launch(headless=True)
-        context = browser.new_context(user_agent=USER_AGENT)
-        page = context.new_page()
+    wgi_url = f"https://www.wgi.org/scores/color-guard-score-event/?ShowId={show_id}"
+    try:
+        html = fetcher.fetch(wgi_url, "score_event") # Falls back to Chromium while Salesforce renders the tables
+        archive_data, finals_complete = parse_archive_scores(html)
+    except Exception as e:
+        print(f"⚠️ [WORKER] Archive Scrape Error: {e}")
 
-        # --- PASS 1: Roster from prelims (PDF or HTML) ---
-        if prelims_url:
-            if prelims_url.lower().endswith('.pdf'):
-                parse_pdf_schedule(prelims_url, combined_data)
-            else:
-                parse_html_schedule(prelims_url, combined_data, page)
+    save_archive(show_id, event_name, archive_data, finals_complete, cached)
 
-        if not combined_data:
-            db["projection_state"].update_one(
-                {"type": "current_projection"},
-                {"$set": {"status": "failed", "error": "No guards found. Is the schedule posted yet?"}},
-                upsert=True
-            )
-            browser.close()
-            return
+# How many score pages an archive backfill loads at once (be polite to wgi.org)
+ARCHIVE_BACKFILL_CONCURRENCY = int(os.environ.get("WGI_ARCHIVE_BACKFILL_CONCURRENCY", "4"))
 
-        print(f"✅ Found {len(combined_data)} guards in roster.")
+def backfill_archives():
+    """Scrapes every discovered ShowId whose archive is missing or not final yet."""
+    events = {e["show_id"]: e.get("name", "") for e in db["event_metadata"].find({"show_id": {"$nin": [None, ""]}}, {"_id": 0})}
+    cached = {
+        doc["show_id"]: doc
+        for doc in archive_collection.find({"type": "archive", "show_id": {"$in": list(events)}}, {"show_id": 1, "final": 1, "data": 1, "scraped_at": 1, "changed_at": 1})
+    }
+    todo = [show_id for show_id in events if not cached.get(show_id, {}).get("final")]
+    print(f"📦 [WORKER] Archive backfill: {len(todo)} of {len(events)} events need scraping ({ARCHIVE_BACKFILL_CONCURRENCY} at a time)...")
 
-        # --- PASS 2: Finals spot counts (PDF or HTML) ---
-        if finals_url:
-            if finals_url.lower().endswith('.pdf'):
-                count_pdf_finals_spots(finals_url, class_spots)
-            else:
-                count_html_finals_spots(finals_url, class_spots, page)
-            print(f"✅ Finals spots: {class_spots}")
+    urls = [f"https://www.wgi.org/scores/color-guard-score-event/?ShowId={show_id}" for show_id in todo]
+    pages = fetcher.fetch_many(urls, "score_event", ARCHIVE_BACKFILL_CONCURRENCY)
+
+    for show_id, html in zip(todo, pages):
+        try:
+            archive_data, finals_complete = parse_archive_scores(html)
+        except Exception as e:
+            print(f"⚠️ [WORKER] Archive Scrape Error for {events[show_id]}: {e}")
+            archive_data, finals_complete = [], False
+        save_archive(show_id, events[show_id], archive_data, finals_complete, cached.get(show_id))
+
+    print(f"🎉 [WORKER] Archive backfill complete.")
+
+def season_averages(guard_classes):
+    """Returns {(guard, class): {"avg", "shows", "spread"}} for a whole roster in one aggregation."""
+    guard_classes = list(guard_classes)
+    if not guard_classes:
+        return {}
+    pipeline = [
+        {"$match": {"$or": [{"Guard": guard, "Class": g_class} for guard, g_class in guard_classes]}},
+        {"$group": {"_id": {"Guard": "$Guard", "Class": "$Class"}, "scores": {"$push": "$Score"}}},
+    ]
+    season = {}
+    for doc in national_collection.aggregate(pipeline):
+        avg, spread = score_profile(doc["scores"])
+        season[(doc["_id"]["Guard"], doc["_id"]["Class"])] = {
+            "avg": avg, "shows": len(doc["scores"]), "spread": spread
+        }
+    return season
 
-        browser.close()
+def scrape_projection(show_name, prelims_url, finals_url):
+    print(f"🔮 [WORKER] Building Projection for: {show_name}...")
+    # --- PASS 1 & 2: Roster and finals spot counts (PDF or HTML) ---
+    combined_data, class_spots = load_show_schedule(prelims_url, finals_url)
+
+    if not combined_data:
+        db["projection_state"].update_one(
+            {"type": "current_projection"},
+            {"$set": {"status": "failed", "error": "No guards found. Is the schedule posted yet?"}},
+            upsert=True
+        )
+        return
+
+    print(f"✅ Found {len(combined_data)} guards in roster.")
+
+    if finals_url:
+        print(f"✅ Finals spots: {class_spots}")
 
     # --- PASS 3: Replace live scores with season averages ---
+    season = season_averages(
+        (guard_name, guard_data["Class"].split(" - ")[0].strip())
+        for guard_name, guard_data in combined_data.items()
+    )
     for guard_name, guard_data in combined_data.items():
-        base_class = guard_data["Class"].split(" - ")[0].strip()
-        scores = list(db["wgi_analytics"].find(
-            {"Guard": guard_name, "Class": base_class},
-            {"_id": 0, "Score": 1}
-        ))
-        if scores:
-            combined_data[guard_name]["Prelims Score"] = round(
-                sum(s["Score"] for s in scores) / len(scores), 3
-            )
-            combined_data[guard_name]["Shows Attended"] = len(scores)
+        stats = season.get((guard_name, guard_data["Class"].split(" - ")[0].strip()))
+        if stats:
+            guard_data["Prelims Score"] = round(stats["avg"], 3)
+            guard_data["Shows Attended"] = stats["shows"]
+            guard_data["Score Spread"] = round(stats["spread"], 3) if stats["spread"] is not None else None
 
-    # --- SAVE TO MONGODB ---
+    # --- PASS 4: Advancement odds from simulated runs of the show ---
     final_list = list(combined_data.values())
+    started = time.perf_counter()
+    for guard_data, odds in zip(final_list, simulate_advancement(final_list, class_spots, show_name)):
+        guard_data.update(odds)
+    print(f"🎲 [WORKER] Simulated {SIMULATIONS} runs of {show_name} in {time.perf_counter() - started:.2f}s")
+
+    # --- SAVE TO MONGODB ---
     if final_list:
         db["projection_state"].update_one(
             {"type": "current_projection"},
@@ -603,70 +748,154 @@ def scrape_projection(show_name, prelims_url, finals_url):
             upsert=True
         )
 
+def run_command(command):
+    action = command.get("action")
+    if action == "sync_national":
+        scrape_national_scores()
+
+    elif action == "sync_live":
+        scrape_live_show(
+            command.get("show_id"), 
+            command.get("prelims_url"), 
+            command.get("finals_url")
+        )
+
+    elif action == "sync_archive":
+        scrape_archive(
+            command.get("show_id"), 
+            command.get("event_name"),
+            force=command.get("force", False)
+        )
+
+    elif action == "sync_archive_backfill":
+        backfill_archives()
+
+    elif action == "sync_projection":
+        scrape_projection(
+            command.get("show_name"),
+            command.get("prelims_url"),
+            command.get("finals_url")
+        )
+
 # =====================================================================
-# --- THE WORKER BRAIN (Command Listener) ---
+# --- THE WORKER BRAIN (Command Lanes) ---
 # =====================================================================
-import time
+# Each action gets its own threads, so a long discovery never holds up a live resync
+ACTION_CONCURRENCY = {
+    "sync_live": 1,
+    "sync_archive": 2,
+    "sync_archive_backfill": 1,
+    "sync_projection": 1,
+    "sync_national": 1,
+}
+LIVE_RESYNC_SECONDS = 180
+
+shutdown = threading.Event()
+live_sync = {"last": 0}
+
+def publish_stats():
+    db["system_state"].update_one(
+        {"type": "wait_stats"}, {"$set": {"targets": wait_stats()}}, upsert=True
+    )
+    db["system_state"].update_one(
+        {"type": "fetch_stats"}, {"$set": fetcher.stats()}, upsert=True
+    )
+    fetcher.report()
+
+def auto_resync_live():
+    active_show = db["system_state"].find_one({"type": "active_show_name"})
+    if active_show and (time.time() - live_sync["last"] > LIVE_RESYNC_SECONDS):
+        print("⏰ Auto-resyncing live scores...")
+        try:
+            # Only the scores page is fetched; the schedule comes from the store
+            scrape_live_show(
+                active_show.get("show_id"),
+                active_show.get("p_url"),
+                active_show.get("f_url"),
+                refresh_schedule=False
+            )
+            live_sync["last"] = time.time()
+        except Exception as e:
+            print(f"❌ [WORKER] Auto-sync error: {e}")
 
-if __name__ == "__main__":
-    print("⚙️ Worker Node Online. Listening for Streamlit commands...")
-    
-    db["system_state"].delete_many({"type": "scraper_command"})
-    
-    last_live_sync = 0
+def run_lane(action, slot):
+    """Claims and runs `action` commands until shutdown. Slot 0 of sync_live also owns the auto-resync.
 
-    while True:
-        # Check the database for a new command from Streamlit
-        command = db["system_state"].find_one({"type": "scraper_command"})
-        
-        if command:
-            action = command.get("action")
-            print(f"\n📥 Received command: {action}")
-            
-            try:
-                if action == "sync_national":
-                    scrape_national_scores()
-                
-                elif action == "sync_live":
-                    scrape_live_show(
-                        command.get("show_id"), 
-                        command.get("prelims_url"), 
-                        command.get("finals_url")
-                    )
-                    last_live_sync = time.time()
-                
-                elif action == "sync_archive":
-                    scrape_archive(
-                        command.get("show_id"), 
-                        command.get("event_name")
-                    )
-
-                elif action == "sync_projection":
-                    scrape_projection(
-                        command.get("show_name"),
-                        command.get("prelims_url"),
-                        command.get("finals_url")
-                    )
-                    
-            except Exception as e:
-                print(f"❌ [WORKER] Fatal error executing command '{action}': {e}")
-            
-            db["system_state"].delete_one({"_id": command["_id"]})
-            print("⏳ Task complete. Listening for next command...")
-
-        # Auto-resync live scores every 3 minutes if a show is active
-        else:
-            active_show = db["system_state"].find_one({"type": "active_show_name"})
-            if active_show and (time.time() - last_live_sync > 180):
-                print("⏰ Auto-resyncing live scores...")
+    sync_live lanes always keep their Chromium. Every other lane keeps it warm for back-to-back
+    commands and closes it once the lane has sat idle for LANE_BROWSER_IDLE_SECONDS.
+    """
+    command_queue = CommandQueue(
+        command_collection, actions=[action], name=f"{action}-{slot}", poll_interval=COMMAND_POLL_SECONDS
+    )
+    owns_resync = action == "sync_live" and slot == 0
+    keeps_browser = action == "sync_live"
+    last_command_at = None
+
+    try:
+        while not shutdown.is_set():
+            # Relaunch this lane's Chromium if it crashed during the last command
+            browser_pool.health_check()
+
+            # Close an idle lane's browser; the next command relaunches it on demand
+            if not keeps_browser and last_command_at and time.time() - last_command_at >= LANE_BROWSER_IDLE_SECONDS:
+                print(f"💤 [{action}-{slot}] Idle for {LANE_BROWSER_IDLE_SECONDS}s. Closing its browser.")
+                browser_pool.close()
+                last_command_at = None
+
+            # Sleep until Streamlit sends a command, or until the next auto-resync is due
+            if owns_resync:
+                resync_due = LIVE_RESYNC_SECONDS - (time.time() - live_sync["last"])
+                timeout = min(30, max(5, resync_due))
+            else:
+                timeout = 30
+            command = command_queue.wait(timeout=timeout)
+
+            if command:
+                print(f"\n📥 [{action}-{slot}] Claimed command (attempt {command.get('attempts', 1)})")
                 try:
-                    scrape_live_show(
-                        active_show.get("show_id"),
-                        active_show.get("p_url"),
-                        active_show.get("f_url")
-                    )
-                    last_live_sync = time.time()
+                    with command_queue.leased(command):
+                        run_command(command)
+                    command_queue.done(command)
                 except Exception as e:
-                    print(f"❌ [WORKER] Auto-sync error: {e}")
-            
-        time.sleep(2)
\ No newline at end of file
+                    print(f"❌ [WORKER] Fatal error executing command '{action}': {e}")
+                    if command_queue.fail(command, e):
+                        print("🔁 [WORKER] Command re-queued for another attempt.")
+                else:
+                    if action == "sync_live":
+                        live_sync["last"] = time.time()
+
+                last_command_at = time.time()
+                publish_stats()
+                print(f"⏳ [{action}-{slot}] Task complete. Listening for next command...")
+
+            # Auto-resync live scores every 3 minutes if a show is active
+            elif owns_resync:
+                auto_resync_live()
+    finally:
+        command_queue.close()
+        browser_pool.close()
+
+if __name__ == "__main__":
+    init_worker()
+    print("⚙️ Worker Node Online. Listening for Streamlit commands...")
+    # Start the PDF page workers up front so the first schedule doesn't wait on them
+    start_page_pool(PDF_PAGE_WORKERS)
+    # Commands left over from a crashed worker are re-delivered once their leases expire
+
+    lanes = [
+        threading.Thread(target=run_lane, args=(action, slot), name=f"{action}-{slot}", daemon=True)
+        for action, limit in ACTION_CONCURRENCY.items()
+        for slot in range(limit)
+    ]
+    for lane in lanes:
+        lane.start()
+
+    try:
+        while any(lane.is_alive() for lane in lanes):
+            time.sleep(1)
+    except KeyboardInterrupt:
+        print("🛑 Worker shutting down...")
+        shutdown.set()
+        # Idle lanes notice within one wait; busy ones are abandoned and their leases expire
+        for lane in lanes:
+            lane.join(timeout=35)
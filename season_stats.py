@@ -0,0 +1,78 @@
+import time
+import uuid
+import pymongo
+
+
+def refresh_season_stats(db, classes=None):
+    """Rebuilds season_stats and class_index from wgi_analytics for `classes` (every class if None).
+
+    One row per Guard/Class with Season_High, Average_Score, Shows_Attended, High_Rank (by
+    season high), Rank and Percentile (by average) and Class_Size. Ranks only depend on the
+    guard's own class, so an ingest only needs to refresh the classes it touched. class_index
+    lists each class's shows. Rows are merged in place, so readers never see a class half-built.
+    """
+    stats = db["season_stats"]
+    stats.create_index([("Guard", pymongo.ASCENDING), ("Class", pymongo.ASCENDING)], unique=True)
+    stats.create_index([("Class", pymongo.ASCENDING), ("Rank", pymongo.ASCENDING)])
+
+    classes = sorted(set(classes)) if classes is not None else None
+    if classes is not None and not classes:
+        return
+    refresh_id = uuid.uuid4().hex
+    match = {"Class": {"$in": classes}} if classes is not None else {}
+
+    db["wgi_analytics"].aggregate([
+        {"$match": match},
+        {"$group": {
+            "_id": {"Guard": "$Guard", "Class": "$Class"},
+            "Season_High": {"$max": "$Score"},
+            "Average_Score": {"$avg": "$Score"},
+            "Shows_Attended": {"$sum": 1},
+        }},
+        {"$project": {
+            "_id": 0, "Guard": "$_id.Guard", "Class": "$_id.Class",
+            "Season_High": 1, "Average_Score": 1, "Shows_Attended": 1,
+        }},
+        {"$setWindowFields": {
+            "partitionBy": "$Class", "sortBy": {"Season_High": -1},
+            "output": {"High_Rank": {"$documentNumber": {}}},
+        }},
+        {"$setWindowFields": {
+            "partitionBy": "$Class", "sortBy": {"Average_Score": -1},
+            "output": {
+                "Rank": {"$documentNumber": {}},
+                "Class_Size": {"$count": {}, "window": {"documents": ["unbounded", "unbounded"]}},
+            },
+        }},
+        {"$set": {
+            "Percentile": {"$multiply": [{"$divide": [{"$subtract": ["$Class_Size", "$Rank"]}, "$Class_Size"]}, 100]},
+            "refresh_id": refresh_id,
+            "updated_at": time.time(),
+        }},
+        {"$merge": {"into": "season_stats", "on": ["Guard", "Class"], "whenMatched": "replace", "whenNotMatched": "insert"}},
+    ])
+
+    # Guards that no longer have any rows in the refreshed classes
+    stats.delete_many({**match, "refresh_id": {"$ne": refresh_id}})
+
+    # The Overview tab's division -> event pickers
+    class_index = db["class_index"]
+    class_index.create_index([("Class", pymongo.ASCENDING)], unique=True)
+    db["wgi_analytics"].aggregate([
+        {"$match": match},
+        {"$group": {"_id": "$Class", "shows": {"$addToSet": "$Show"}}},
+        {"$project": {"_id": 0, "Class": "$_id", "shows": 1, "refresh_id": refresh_id}},
+        {"$merge": {"into": "class_index", "on": "Class", "whenMatched": "replace", "whenNotMatched": "insert"}},
+    ])
+    class_index.delete_many({**match, "refresh_id": {"$ne": refresh_id}})
+    print(f"📈 Season stats refreshed for {len(classes) if classes is not None else 'all'} classes.")
+
+
+if __name__ == "__main__":
+    # One-off build of season_stats from whatever is in wgi_analytics
+    from seed_db import connect_db
+    from data_version import bump_data_version
+    db = connect_db()
+    refresh_season_stats(db)
+    # The dashboard caches class_index per data version, so a rebuild has to move it on
+    bump_data_version(db, "wgi_analytics")
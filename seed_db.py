@@ -1,11 +1,22 @@
 import os
-from playwright.sync_api import sync_playwright
+import sys
+import time
 from bs4 import BeautifulSoup
-import pandas as pd
+from browser_pool import ThreadBrowserPools
+from fetch_layer import PageFetcher
+from schedule_store import content_version
+from staged_collection import StagedCollection, NATIONAL_KEY, CLASS_SHOW_INDEX
+from seed_pipeline import SeedPipeline
+from season_stats import refresh_season_stats
+from guard_registry import GuardRegistry
+from data_version import bump_data_version
+from finals_status import FinalsTracker, settle_final
 import pymongo
+from pymongo import UpdateOne, DeleteMany
 import streamlit as st
 import re
 
+USER_AGENT = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36"
 
 def clean_class_name(raw_class):
     """Strips out WGI round/prelim/finals tags to keep classes unified."""
@@ -13,144 +24,272 @@ def clean_class_name(raw_class):
     clean = re.sub(r'(?i)\s*\((Prelims|Finals|Round.*|Semi.*)\)', '', clean)
     return clean.strip()
 
+def connect_db():
+    # 1. Look in the cloud environment first
+    mongo_url = os.environ.get("MONGO_URI")
+
+    # 2. If it's empty (running locally), use Streamlit secrets
+    if not mongo_url:
+        mongo_url = st.secrets["MONGO_URI"]
+
+    client = pymongo.MongoClient(mongo_url)
+    return client["rankings_2026"]
+
+def find_live_shows(fetcher):
+    """Returns {score page url: show name} from the WGI scores index."""
+    html = fetcher.fetch("https://www.wgi.org/scores/color-guard-scores/", "scores_index")
+    if not html:
+        print("Timeout waiting for main page links.")
+
+    soup = BeautifulSoup(html or "", 'html.parser')
+    live_shows = {}
+
+    for link in soup.find_all('a', href=True):
+        href = link['href']
+        if 'ShowId=' in href:
+            # Attempt to grab the show name from the link or its parent row
+            show_name = link.get_text(strip=True)
+            if not show_name or "View" in show_name or "Score" in show_name:
+                row = link.find_parent('tr')
+                if row:
+                    cols = row.find_all('td')
+                    if len(cols) > 0:
+                        show_name = cols[0].get_text(strip=True)
+
+            if not show_name: show_name = "Unknown Regional"
+
+            full_url = href if href.startswith('http') else f"https://www.wgi.org{href}"
+            live_shows[full_url] = show_name
+
+    return live_shows
+
+def parse_event_scores(event_html, show_name, master_dict, registry=None):
+    """Adds every performance on a score event page to master_dict. Returns True once every class's finals are posted."""
+    finals = FinalsTracker()
+    event_soup = BeautifulSoup(event_html, 'html.parser')
+
+    for table in event_soup.find_all('table'):
+        current_class = "Unknown Class"
+        raw_class = current_class
+
+        for row in table.find_all('tr'):
+            div_header = row.find('th', class_='division-name')
+            if div_header:
+                raw_class = div_header.get_text(strip=True)
+                current_class = clean_class_name(raw_class)
+                continue
+
+            cells = row.find_all('td')
+            if len(cells) >= 3:
+                try:
+                    team_name = cells[1].get_text(strip=True)
+                    score_clean = cells[2].get_text(strip=True).upper().replace("VIEW RECAP", "").strip()
+                    score = float(score_clean)
+                    if registry and team_name:
+                        team_name = registry.canonical(team_name, source="scores")
+                    finals.add(raw_class, current_class)
+
+                    # UNIQUE KEY: Guard + Class + Show (Ensures all performances are saved)
+                    guard_key = f"{team_name}_{current_class}_{show_name}"
+
+                    # If they performed in prelims and finals at the SAME show, keep the higher score
+                    if guard_key in master_dict:
+                        if score > master_dict[guard_key]['Score']:
+                            master_dict[guard_key]['Score'] = score
+                    else:
+                        master_dict[guard_key] = {
+                            'Show': show_name,
+                            'Class': current_class,
+                            'Guard': team_name,
+                            'Score': score
+                        }
+                except (ValueError, IndexError):
+                    continue
+
+    return finals.complete
+
+# Pipeline sizing for the nightly window (see the per-stage report at the end of a run)
+SEED_FETCH_WORKERS = int(os.environ.get("SEED_FETCH_WORKERS", "4"))
+SEED_PARSE_WORKERS = int(os.environ.get("SEED_PARSE_WORKERS", "2"))
+SEED_BATCH_ROWS = int(os.environ.get("SEED_BATCH_ROWS", "500"))
+
+def parse_show(event_html, show_name):
+    # Runs in the pipeline's parser processes, so it has no registry; names are canonicalized at write time
+    show_dict = {}
+    finals_complete = parse_event_scores(event_html, show_name, show_dict)
+    return list(show_dict.values()), finals_complete
+
+def canonical_rows(rows, registry):
+    """Renames rows to canonical guard names, keeping the higher score if two spellings collide."""
+    merged = {}
+    for row in rows:
+        row = {**row, "Guard": registry.canonical(row["Guard"], source="scores")}
+        key = (row["Guard"], row["Class"], row["Show"])
+        if key not in merged or row["Score"] > merged[key]["Score"]:
+            merged[key] = row
+    return list(merged.values())
+
+def run_seed_pipeline(fetcher, jobs, write_fn, registry):
+    def write_canonical(items):
+        for item in items:
+            item["rows"] = canonical_rows(item["rows"], registry)
+        write_fn(items)
+
+    pipeline = SeedPipeline(
+        fetcher, parse_show, write_canonical,
+        fetch_workers=SEED_FETCH_WORKERS, parse_workers=SEED_PARSE_WORKERS, batch_rows=SEED_BATCH_ROWS
+    )
+    pipeline.run(jobs)
+    pipeline.report()
+
 def scrape_all_wgi_to_mongo():
     master_dict = {}
 
-    with sync_playwright() as p:
-        print("Launching browser...")
-        browser = p.chromium.launch(
-            headless=True, 
-            args=["--disable-blink-features=AutomationControlled"]
-        )
-
-        # 1. Put on the mask (Spoofing a real Windows machine)
-        context = browser.new_context(
-            user_agent="Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36",
-            viewport={"width": 1920, "height": 1080},
-            
-        )
-
-        # 2. Open the page using that disguised context
-        page = context.new_page()
-
-        # 3. Now go to the URL (Keep your 60s timeout!)
-        page.goto(
-            "https://www.wgi.org/scores/color-guard-scores/", 
-            timeout=60000, 
-            wait_until="domcontentloaded"
-        )
+    print("\nConnecting to MongoDB...")
+    db = connect_db()
+    # Rows go to a staging collection as each batch of events finishes; the live one is only replaced at the end
+    staged = StagedCollection(db, "wgi_analytics").begin()
+
+    # Chromium only launches (one per fetch thread) if a page can't be read over plain HTTP
+    pool = ThreadBrowserPools(USER_AGENT, viewport={"width": 1920, "height": 1080})
+    fetcher = PageFetcher(pool, USER_AGENT, pool_size=SEED_FETCH_WORKERS)
 
+    def write_batch(items):
+        rows = [row for item in items for row in item["rows"]]
+        staged.add(rows)
+        for row in rows:
+            guard_key = f"{row['Guard']}_{row['Class']}_{row['Show']}"
+            if guard_key not in master_dict or row['Score'] > master_dict[guard_key]['Score']:
+                master_dict[guard_key] = row
+
+    try:
         # --- PART 1: GET ALL WGI EVENT URLs AND SHOW NAMES ---
         print("Fetching master list of WGI events...")
-        page.goto(
-            "https://www.wgi.org/scores/color-guard-scores/", 
-            timeout=60000, 
-            wait_until="domcontentloaded"
-        )
-        
-        try:
-            page.wait_for_selector("a[href*='ShowId']", timeout=20000)
-        except Exception:
-            print("Timeout waiting for main page links.")
-        
-        soup = BeautifulSoup(page.content(), 'html.parser')
-        live_shows = {}
-        
-        for link in soup.find_all('a', href=True):
-            href = link['href']
-            if 'ShowId=' in href:
-                # Attempt to grab the show name from the link or its parent row
-                show_name = link.get_text(strip=True)
-                if not show_name or "View" in show_name or "Score" in show_name:
-                    row = link.find_parent('tr')
-                    if row:
-                        cols = row.find_all('td')
-                        if len(cols) > 0:
-                            show_name = cols[0].get_text(strip=True)
-                
-                if not show_name: show_name = "Unknown Regional"
-                
-                full_url = href if href.startswith('http') else f"https://www.wgi.org{href}"
-                live_shows[full_url] = show_name
-        
+        live_shows = find_live_shows(fetcher)
         print(f"Found {len(live_shows)} unique regional events.")
 
         # --- PART 2: SCRAPE EVERY EVENT USING YOUR TRUSTED LOGIC ---
-        for idx, (url, show_name) in enumerate(live_shows.items()):
-            print(f"Scraping event {idx + 1} of {len(live_shows)}: {show_name}...")
-            try:
-                page.goto(url)
-                page.wait_for_selector("table", timeout=15000)
-                page.wait_for_timeout(4000) 
-                
-                event_soup = BeautifulSoup(page.content(), 'html.parser')
-                all_tables = event_soup.find_all('table')
-                
-                for table in all_tables:
-                    current_class = "Unknown Class"
-                    
-                    for row in table.find_all('tr'):
-                        div_header = row.find('th', class_='division-name')
-                        if div_header:
-                            current_class = clean_class_name(div_header.get_text(strip=True)) 
-                            continue 
-
-                        cells = row.find_all('td')
-                        if len(cells) >= 3:
-                            try:
-                                team_name = cells[1].get_text(strip=True)
-                                score_clean = cells[2].get_text(strip=True).upper().replace("VIEW RECAP", "").strip()
-                                score = float(score_clean)
-
-                                # UNIQUE KEY: Guard + Class + Show (Ensures all performances are saved)
-                                guard_key = f"{team_name}_{current_class}_{show_name}"
-                                
-                                # If they performed in prelims and finals at the SAME show, keep the higher score
-                                if guard_key in master_dict:
-                                    if score > master_dict[guard_key]['Score']:
-                                        master_dict[guard_key]['Score'] = score
-                                else:
-                                    master_dict[guard_key] = {
-                                        'Show': show_name,
-                                        'Class': current_class,
-                                        'Guard': team_name,
-                                        'Score': score
-                                    }
-                            except (ValueError, IndexError):
-                                continue
-            except Exception as e:
-                print(f"No data or timeout at {show_name}.")
-        
-        browser.close()
-
-    # --- PART 3: FINAL DATABASE EXPORT ---
-    master_list = list(master_dict.values())
-    
-    if master_list:
-        df = pd.DataFrame(master_list)
-
-        print("\nConnecting to MongoDB...")
-        # 1. Look in the cloud environment first
-        mongo_url = os.environ.get("MONGO_URI")
-
-        # 2. If it's empty (running locally), use Streamlit secrets
-        if not mongo_url:
-            mongo_url = st.secrets["MONGO_URI"]
-
-        client = pymongo.MongoClient(mongo_url)
-        
-        db = client["rankings_2026"]
-        collection = db["wgi_analytics"]
-
-        collection.drop()
-        print("Dropped old collection.")
-
-        records = df.to_dict("records")
-        collection.insert_many(records)
-        
-        print(f"Success! {len(records)} individual performances saved to MongoDB.")
+        run_seed_pipeline(fetcher, list(live_shows.items()), write_batch, GuardRegistry(db["guard_registry"]))
+    finally:
+        pool.close()
+
+    fetcher.report()
+
+    # --- PART 3: SWAP THE NEW DATASET IN ---
+    if master_dict:
+        if staged.commit(expected=len(master_dict)):
+            print(f"Success! {len(master_dict)} individual performances saved to MongoDB.")
+            refresh_season_stats(db)
+            bump_data_version(db, "wgi_analytics")
     else:
         print("No data found across all tables.")
 
+def seed_incremental():
+    """Nightly mode: only scrapes ShowIds that are new or not final yet, and upserts their scores.
+
+    seed_ledger remembers each ingested ShowId, a hash of its scores, when they last changed and
+    whether it's final (every class's finals posted, or no change for SETTLE_HOURS; see
+    finals_status). Final shows are never scraped again. A re-scraped show's rows replace its
+    old ones, so renamed guards or classes don't leave stale duplicates behind.
+    """
+    db = connect_db()
+    collection = db["wgi_analytics"]
+    ledger = db["seed_ledger"]
+    collection.create_index(NATIONAL_KEY, unique=True)
+    collection.create_index(CLASS_SHOW_INDEX)
+    # Ledger entries without changed_at were marked final by the old "any Finals header" rule; check them again
+    final_ids = {doc["show_id"] for doc in ledger.find({"final": True, "changed_at": {"$exists": True}}, {"show_id": 1})}
+
+    pool = ThreadBrowserPools(USER_AGENT, viewport={"width": 1920, "height": 1080})
+    fetcher = PageFetcher(pool, USER_AGENT, pool_size=SEED_FETCH_WORKERS)
+    written = [0]
+    touched_classes = set()
+
+    def write_batch(items):
+        items = [item for item in items if item["rows"]]
+        if not items:
+            return
+
+        previous = {
+            doc["show_id"]: doc
+            for doc in ledger.find(
+                {"show_id": {"$in": [item["url"].split("ShowId=")[-1] for item in items]}},
+                {"show_id": 1, "show_name": 1, "hash": 1, "changed_at": 1, "ingested_at": 1}
+            )
+        }
+
+        ops = []
+        for item in items:
+            show_id = item["url"].split("ShowId=")[-1]
+            names = {item["show_name"]}
+            # The show was listed under another name last time: its old rows go too
+            if show_id in previous and previous[show_id].get("show_name"):
+                names.add(previous[show_id]["show_name"])
+            # Classes the show had before, in case a renamed one disappears
+            touched_classes.update(collection.distinct("Class", {"Show": {"$in": list(names)}}))
+            # Rows from this show that the new scrape no longer has (renamed guard or class)
+            ops.append(DeleteMany({
+                "Show": {"$in": list(names)},
+                "$nor": [{"Guard": r["Guard"], "Class": r["Class"], "Show": r["Show"]} for r in item["rows"]],
+            }))
+            # Upserts keyed on Guard/Class/Show, so re-running a night is harmless
+            ops.extend(
+                UpdateOne(
+                    {"Guard": r["Guard"], "Class": r["Class"], "Show": r["Show"]},
+                    {"$set": {"Score": r["Score"]}},
+                    upsert=True
+                )
+                for r in item["rows"]
+            )
+        # Deletes and upserts never touch the same key, so order doesn't matter
+        collection.bulk_write(ops, ordered=False)
+        written[0] += sum(len(item["rows"]) for item in items)
+        touched_classes.update(r["Class"] for item in items for r in item["rows"])
+
+        # Only mark shows ingested once their rows are safely written
+        for item in items:
+            show_id = item["url"].split("ShowId=")[-1]
+            digest = content_version(item["rows"])
+            prev = previous.get(show_id)
+            final, changed_at = settle_final(
+                item["finals_complete"], bool(prev and prev.get("hash") == digest),
+                prev and (prev.get("changed_at") or prev.get("ingested_at"))
+            )
+            ledger.update_one(
+                {"show_id": show_id},
+                {"$set": {
+                    "show_name": item["show_name"], "hash": digest, "final": final,
+                    "changed_at": changed_at, "ingested_at": time.time()
+                }},
+                upsert=True
+            )
+            print(f"  {item['show_name']}: {len(item['rows'])} performances upserted{' (final)' if final else ''}.")
+
+    try:
+        print("Fetching master list of WGI events...")
+        live_shows = find_live_shows(fetcher)
+        todo = {url: name for url, name in live_shows.items() if url.split("ShowId=")[-1] not in final_ids}
+        print(f"Found {len(live_shows)} events, {len(todo)} new or still changing.")
+
+        run_seed_pipeline(fetcher, list(todo.items()), write_batch, GuardRegistry(db["guard_registry"]))
+    finally:
+        pool.close()
+
+    fetcher.report()
+    print(f"Success! {written[0]} performances upserted from {len(todo)} events.")
+    # Only the classes that got new (or lost stale) scores need their ranks recomputed
+    refresh_season_stats(db, touched_classes)
+    if written[0]:
+        bump_data_version(db, "wgi_analytics")
+
 if __name__ == "__main__":
-    scrape_all_wgi_to_mongo()
\ No newline at end of file
+    # The nightly job runs incrementally; --full rebuilds the collection, --rollback restores the last one
+    if "--rollback" in sys.argv:
+        db = connect_db()
+        if StagedCollection(db, "wgi_analytics").rollback():
+            refresh_season_stats(db)
+            bump_data_version(db, "wgi_analytics")
+    elif "--full" in sys.argv:
+        scrape_all_wgi_to_mongo()
+    else:
+        seed_incremental()
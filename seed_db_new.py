@@ -1,11 +1,17 @@
-from playwright.sync_api import sync_playwright
 from bs4 import BeautifulSoup
-import pandas as pd
+from browser_pool import BrowserPool
+from fetch_layer import PageFetcher
+from staged_collection import StagedCollection
+from season_stats import refresh_season_stats
+from data_version import bump_data_version
+from guard_registry import GuardRegistry
 import pymongo
 import streamlit as st
 import re
 import os
 
+USER_AGENT = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36"
+
 def clean_class_name(raw_class):
     clean = re.sub(r'(?i)\s*-\s*(Prelims|Finals|Round.*|Semi.*)', '', raw_class)
     clean = re.sub(r'(?i)\s*\((Prelims|Finals|Round.*|Semi.*)\)', '', clean)
@@ -14,23 +20,25 @@ def clean_class_name(raw_class):
 def scrape_all_wgi_to_mongo():
     master_dict = {}
 
-    with sync_playwright() as p:
-        browser = p.chromium.launch(
-            headless=True,
-            args=["--disable-blink-features=AutomationControlled"]
-        )
-        context = browser.new_context(
-            user_agent="Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36",
-            viewport={"width": 1920, "height": 1080},
-        )
-        page = context.new_page()
+    mongo_url = os.environ.get("MONGO_URI") or st.secrets["MONGO_URI"]
+    client = pymongo.MongoClient(mongo_url)
+    db = client["rankings_2026"]
+    # Each event's rows go to staging as soon as it's parsed; wgi_analytics is swapped at the end
+    staged = StagedCollection(db, "wgi_analytics").begin()
+    # Same spellings as the live and projection rosters, so season_averages finds these rows
+    registry = GuardRegistry(db["guard_registry"])
+
+    pool = BrowserPool(USER_AGENT, viewport={"width": 1920, "height": 1080})
+    fetcher = PageFetcher(pool, USER_AGENT)
 
+    try:
         # --- PART 1: GET ALL EVENT URLS ---
         print("Fetching master list of WGI events...")
-        page.goto("https://www.wgi.org/scores/color-guard-scores/", timeout=60000, wait_until="domcontentloaded")
-        page.wait_for_selector("a[href*='ShowId']", timeout=20000)
+        html = fetcher.fetch("https://www.wgi.org/scores/color-guard-scores/", "scores_index")
+        if not html:
+            print("Timeout waiting for main page links.")
 
-        soup = BeautifulSoup(page.content(), 'html.parser')
+        soup = BeautifulSoup(html or "", 'html.parser')
         live_shows = {}
 
         for link in soup.find_all('a', href=True):
@@ -54,15 +62,16 @@ def scrape_all_wgi_to_mongo():
         for idx, (url, show_name) in enumerate(live_shows.items()):
             print(f"Scraping event {idx + 1} of {len(live_shows)}: {show_name}...")
             try:
-                page.goto(url, timeout=30000, wait_until="domcontentloaded")
-                # Wait for the actual score table to render
-                page.wait_for_selector("table", timeout=15000)
-                page.wait_for_timeout(3000)
+                event_html = fetcher.fetch(url, "score_event")
+                if not event_html:
+                    print(f"  Error at {show_name}: score tables never rendered")
+                    continue
 
-                event_soup = BeautifulSoup(page.content(), 'html.parser')
+                event_soup = BeautifulSoup(event_html, 'html.parser')
                 all_tables = event_soup.find_all('table')
                 print(f"  Found {len(all_tables)} tables")
 
+                show_dict = {}
                 for table in all_tables:
                     current_class = "Unknown Class"
                     for row in table.find_all('tr'):
@@ -76,12 +85,14 @@ def scrape_all_wgi_to_mongo():
                                 team_name = cells[1].get_text(strip=True)
                                 score_clean = cells[2].get_text(strip=True).upper().replace("VIEW RECAP", "").strip()
                                 score = float(score_clean)
+                                if team_name:
+                                    team_name = registry.canonical(team_name, source="scores")
                                 guard_key = f"{team_name}_{current_class}_{show_name}"
-                                if guard_key in master_dict:
-                                    if score > master_dict[guard_key]['Score']:
-                                        master_dict[guard_key]['Score'] = score
+                                if guard_key in show_dict:
+                                    if score > show_dict[guard_key]['Score']:
+                                        show_dict[guard_key]['Score'] = score
                                 else:
-                                    master_dict[guard_key] = {
+                                    show_dict[guard_key] = {
                                         'Show': show_name,
                                         'Class': current_class,
                                         'Guard': team_name,
@@ -89,23 +100,24 @@ def scrape_all_wgi_to_mongo():
                                     }
                             except (ValueError, IndexError):
                                 continue
+
+                staged.add(list(show_dict.values()))
+                for guard_key, row in show_dict.items():
+                    if guard_key not in master_dict or row['Score'] > master_dict[guard_key]['Score']:
+                        master_dict[guard_key] = row
             except Exception as e:
                 print(f"  Error at {show_name}: {e}")
+    finally:
+        pool.close()
+
+    fetcher.report()
 
-        browser.close()
-
-    # --- PART 3: SAVE TO MONGODB ---
-    master_list = list(master_dict.values())
-    if master_list:
-        df = pd.DataFrame(master_list)
-        mongo_url = os.environ.get("MONGO_URI") or st.secrets["MONGO_URI"]
-        client = pymongo.MongoClient(mongo_url)
-        db = client["rankings_2026"]
-        collection = db["wgi_analytics"]
-        collection.drop()
-        records = df.to_dict("records")
-        collection.insert_many(records)
-        print(f"Success! {len(records)} performances saved to MongoDB.")
+    # --- PART 3: SWAP INTO MONGODB ---
+    if master_dict:
+        if staged.commit(expected=len(master_dict)):
+            print(f"Success! {len(master_dict)} performances saved to MongoDB.")
+            refresh_season_stats(db)
+            bump_data_version(db, "wgi_analytics")
     else:
         print("No data found.")
 
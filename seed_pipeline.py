@@ -0,0 +1,143 @@
+import multiprocessing
+import queue
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+_DONE = object()
+
+
+class SeedPipeline:
+    """Fetch -> parse -> write pipeline for the national seeder.
+
+    Fetch threads pull score pages through a PageFetcher, parse_workers processes turn the HTML
+    into rows (BeautifulSoup holds the GIL, so parser threads would take turns), and a single
+    writer hands them to `write_fn` in batches. The stages are joined by bounded queues, so a
+    slow stage holds the ones before it back instead of piling up pages.
+
+    parse_fn(html, show_name) must be a module-level function (it's pickled to the parser
+    processes) and returns (rows, finals_complete); write_fn(items) receives a list of
+    {"url", "show_name", "rows", "finals_complete"} dicts. Give the fetcher a ThreadBrowserPools so
+    each fetch thread gets its own Chromium for pages that need one.
+    """
+
+    def __init__(self, fetcher, parse_fn, write_fn, fetch_workers=4, parse_workers=2, batch_rows=500, queue_size=8):
+        self.fetcher = fetcher
+        self.parse_fn = parse_fn
+        self.write_fn = write_fn
+        self.fetch_workers = max(1, fetch_workers)
+        self.parse_workers = max(1, parse_workers)
+        self.batch_rows = batch_rows
+        self.queue_size = queue_size
+
+        self._lock = threading.Lock()
+        self.stats = {stage: {"items": 0, "failed": 0, "busy_s": 0.0} for stage in ("fetch", "parse", "write")}
+        self.wall_s = 0.0
+
+    def _record(self, stage, seconds, failed=False, items=1):
+        with self._lock:
+            self.stats[stage]["items" if not failed else "failed"] += items
+            self.stats[stage]["busy_s"] += seconds
+
+    # --- STAGES ---
+    def _fetch_stage(self, jobs, pages):
+        try:
+            while True:
+                try:
+                    url, show_name = jobs.get_nowait()
+                except queue.Empty:
+                    return
+                started = time.perf_counter()
+                try:
+                    html = self.fetcher.fetch(url, "score_event")
+                except Exception as e:
+                    print(f"⚠️ [SEED] Fetch failed for {show_name}: {e}")
+                    html = None
+                self._record("fetch", time.perf_counter() - started, failed=html is None)
+                # Blocks while the parsers are behind
+                pages.put((url, show_name, html))
+        finally:
+            self.fetcher.browser_pool.close()
+
+    def _parse_stage(self, pages, parsed, parse_pool):
+        while True:
+            item = pages.get()
+            if item is _DONE:
+                return
+            url, show_name, html = item
+            if not html:
+                print(f"No data or timeout at {show_name}.")
+                continue
+
+            started = time.perf_counter()
+            try:
+                # The thread just waits on its process, one page in flight per parser
+                rows, finals_complete = parse_pool.submit(self.parse_fn, html, show_name).result()
+            except Exception as e:
+                print(f"⚠️ [SEED] Parse failed for {show_name}: {e}")
+                self._record("parse", time.perf_counter() - started, failed=True)
+                continue
+            self._record("parse", time.perf_counter() - started)
+            parsed.put({"url": url, "show_name": show_name, "rows": rows, "finals_complete": finals_complete})
+
+    def _write_stage(self, parsed):
+        batch, batch_rows = [], 0
+        while True:
+            item = parsed.get()
+            if item is not _DONE:
+                batch.append(item)
+                batch_rows += len(item["rows"])
+            if batch and (item is _DONE or batch_rows >= self.batch_rows):
+                started = time.perf_counter()
+                try:
+                    self.write_fn(batch)
+                    self._record("write", time.perf_counter() - started, items=batch_rows)
+                except Exception as e:
+                    print(f"⚠️ [SEED] Write failed for {len(batch)} events: {e}")
+                    self._record("write", time.perf_counter() - started, failed=True, items=batch_rows)
+                batch, batch_rows = [], 0
+            if item is _DONE:
+                return
+
+    # --- RUN ---
+    def run(self, jobs):
+        """Runs every (url, show_name) job through the pipeline and blocks until it's written."""
+        started = time.perf_counter()
+        job_queue = queue.Queue()
+        for job in jobs:
+            job_queue.put(job)
+        pages = queue.Queue(maxsize=self.queue_size)
+        parsed = queue.Queue(maxsize=self.queue_size)
+
+        # Spawned, not forked: the fetch threads and pymongo's monitors are already running
+        parse_pool = ProcessPoolExecutor(max_workers=self.parse_workers, mp_context=multiprocessing.get_context("spawn"))
+
+        fetchers = [threading.Thread(target=self._fetch_stage, args=(job_queue, pages)) for _ in range(self.fetch_workers)]
+        parsers = [threading.Thread(target=self._parse_stage, args=(pages, parsed, parse_pool)) for _ in range(self.parse_workers)]
+        writer = threading.Thread(target=self._write_stage, args=(parsed,))
+        try:
+            for thread in fetchers + parsers + [writer]:
+                thread.start()
+
+            # Shut the stages down in order once the one before them has drained
+            for thread in fetchers:
+                thread.join()
+            for _ in parsers:
+                pages.put(_DONE)
+            for thread in parsers:
+                thread.join()
+            parsed.put(_DONE)
+            writer.join()
+        finally:
+            parse_pool.shutdown()
+
+        self.wall_s = time.perf_counter() - started
+        return self.stats
+
+    def report(self):
+        print(f"📊 [SEED] Pipeline finished in {self.wall_s:.1f}s "
+              f"({self.fetch_workers} fetchers, {self.parse_workers} parsers)")
+        for stage, unit in (("fetch", "pages"), ("parse", "pages"), ("write", "rows")):
+            s = self.stats[stage]
+            rate = s["items"] / self.wall_s if self.wall_s else 0.0
+            print(f"   {stage:<5}: {s['items']} {unit} ({rate:.2f}/s), {s['failed']} failed, busy {s['busy_s']:.1f}s")
@@ -0,0 +1,113 @@
+import re
+import time
+import numpy as np
+from advancement import POD_SPOTS, WILDCARD_SPOTS, POD1_ROUNDS, POD2_ROUNDS
+
+SIMULATIONS = 10000
+# Score spread for guards with a single show, when no one else in the field has one either
+DEFAULT_SPREAD = 1.5
+# Two near-identical scores would otherwise make a guard look certain
+MIN_SPREAD = 0.5
+
+
+def score_profile(scores):
+    """(mean, spread) from one guard's season scores.
+
+    No trend: wgi_analytics rows carry no show date or sequence, so there is no season order
+    to fit one to.
+    """
+    scores = np.asarray(scores, dtype=float)
+    mean = float(scores.mean())
+    spread = float(scores.std(ddof=1)) if len(scores) >= 2 else None
+    return mean, spread
+
+
+def _top_k(scores, k):
+    """Per simulation (row), which columns hold the k best finite scores."""
+    if k >= scores.shape[1]:
+        return np.isfinite(scores)
+    top = np.zeros(scores.shape, dtype=bool)
+    idx = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+    np.put_along_axis(top, idx, True, axis=1)
+    return top & np.isfinite(scores)
+
+
+def simulate_advancement(roster, class_spots, event_name, sims=SIMULATIONS, seed=None):
+    """Monte Carlo advancement odds for a projected show.
+
+    Each guard's score is drawn from a normal around its season mean with its own spread
+    (guards with one show borrow the field's median spread). All simulations are drawn and
+    ranked as arrays, one base class at a time, using the same rules as calculate_advancement. Returns one dict per roster entry with "Advance Chance" and, for
+    Regional+ Scholastic A, "Pod Chance" and "Wildcard Chance". Guards with no season data and
+    classes without spots get None.
+    """
+    rng = np.random.default_rng(seed)
+    classes = [str(g.get("Class", "")) for g in roster]
+    base = np.array([c.split(" - ")[0] for c in classes], dtype=object)
+    mean = np.array([g.get("Prelims Score") or 0.0 for g in roster], dtype=float)
+    spread = np.array([np.nan if g.get("Score Spread") is None else g["Score Spread"] for g in roster], dtype=float)
+    has_data = mean > 0.0
+
+    measured = has_data & ~np.isnan(spread)
+    fallback = float(np.median(spread[measured])) if measured.any() else DEFAULT_SPREAD
+    spread = np.maximum(np.where(np.isnan(spread), fallback, spread), MIN_SPREAD)
+
+    scores = mean + spread * rng.standard_normal((sims, len(roster)))
+    scores[:, ~has_data] = -np.inf
+
+    advance = np.zeros(len(roster))
+    pod = np.zeros(len(roster))
+    wildcard = np.zeros(len(roster))
+    simulated = np.zeros(len(roster), dtype=bool)
+    pod_rules = np.zeros(len(roster), dtype=bool)
+
+    for base_class in set(base[has_data]):
+        spots = class_spots.get(base_class, 0)
+        if not spots:
+            continue
+        cols = np.flatnonzero((base == base_class) & has_data)
+        class_scores = scores[:, cols]
+        simulated[cols] = True
+
+        # --- REGIONAL+ SCHOLASTIC A: pods, then wildcards from everyone left ---
+        if "+" in event_name and base_class == "Scholastic A":
+            pod_adv = np.zeros(class_scores.shape, dtype=bool)
+            for rounds in (POD1_ROUNDS, POD2_ROUNDS):
+                in_pod = np.array([bool(re.search(rounds, classes[i])) for i in cols])
+                pod_adv |= _top_k(np.where(in_pod, class_scores, -np.inf), POD_SPOTS)
+            wild = _top_k(np.where(pod_adv, -np.inf, class_scores), WILDCARD_SPOTS)
+            pod[cols] = pod_adv.mean(axis=0)
+            wildcard[cols] = wild.mean(axis=0)
+            advance[cols] = (pod_adv | wild).mean(axis=0)
+            pod_rules[cols] = True
+        else:
+            advance[cols] = _top_k(class_scores, spots).mean(axis=0)
+
+    results = []
+    for i in range(len(roster)):
+        if not simulated[i]:
+            results.append({"Advance Chance": None})
+            continue
+        odds = {"Advance Chance": round(float(advance[i]), 4)}
+        if pod_rules[i]:
+            odds["Pod Chance"] = round(float(pod[i]), 4)
+            odds["Wildcard Chance"] = round(float(wildcard[i]), 4)
+        results.append(odds)
+    return results
+
+
+if __name__ == "__main__":
+    # Timing on a synthetic full Regional+ roster
+    rng = np.random.default_rng(0)
+    bench_classes = [f"Scholastic A - Round {i}" for i in range(1, 5) for _ in range(15)]
+    bench_classes += [c for c in ("Regional A", "Scholastic Open", "Independent A") for _ in range(30)]
+    bench_roster = [
+        {"Class": c, "Prelims Score": rng.uniform(60, 90), "Shows Attended": 4, "Score Spread": rng.uniform(0.5, 3)}
+        for c in bench_classes
+    ]
+    bench_spots = {"Scholastic A": 15, "Regional A": 10, "Scholastic Open": 12, "Independent A": 10}
+
+    started = time.perf_counter()
+    simulate_advancement(bench_roster, bench_spots, "Benchmark Regional+")
+    print(f"⏱️ simulate_advancement: {(time.perf_counter() - started) * 1000:.0f} ms for "
+          f"{len(bench_roster)} guards x {SIMULATIONS} shows")
@@ -0,0 +1,80 @@
+import pymongo
+from pymongo import UpdateOne
+
+NATIONAL_KEY = [("Guard", pymongo.ASCENDING), ("Class", pymongo.ASCENDING), ("Show", pymongo.ASCENDING)]
+# Serves the Overview tab's one-class-at-one-show results
+CLASS_SHOW_INDEX = [("Class", pymongo.ASCENDING), ("Show", pymongo.ASCENDING), ("Score", pymongo.DESCENDING)]
+
+
+class StagedCollection:
+    """Builds a replacement for a collection off to the side and swaps it in atomically.
+
+    Rows land in `<name>_staging` as they're scraped. commit() checks the row count, snapshots
+    the live collection to `<name>_prev` for rollback, then renames staging over the live one,
+    so readers only ever see the old dataset or the complete new one.
+    """
+
+    def __init__(self, db, name, key=NATIONAL_KEY, indexes=(CLASS_SHOW_INDEX,), min_ratio=0.5):
+        self.db = db
+        self.name = name
+        self.key = key
+        self.indexes = indexes
+        self.min_ratio = min_ratio
+        self.staging = db[f"{name}_staging"]
+
+    def begin(self):
+        # Leftovers from a run that died mid-scrape
+        self.staging.drop()
+        self.staging.create_index(self.key, unique=True)
+        for index in self.indexes:
+            self.staging.create_index(index)
+        return self
+
+    def add(self, records):
+        """Upserts a chunk of rows into staging, keeping the higher score for repeated keys."""
+        if not records:
+            return
+        ops = [
+            UpdateOne(
+                {field: r[field] for field, _ in self.key},
+                {"$max": {"Score": r["Score"]}},
+                upsert=True
+            )
+            for r in records
+        ]
+        self.staging.bulk_write(ops, ordered=False)
+
+    def commit(self, expected=None):
+        """Swaps staging in. Returns False (leaving the live collection alone) if validation fails."""
+        staged = self.staging.count_documents({})
+        live = self.db[self.name].estimated_document_count()
+
+        if staged == 0:
+            print(f"Staging for {self.name} is empty, keeping the live collection.")
+            return False
+        if expected is not None and staged != expected:
+            print(f"Staging for {self.name} has {staged} rows, expected {expected}. Keeping the live collection.")
+            return False
+        if live and staged < live * self.min_ratio:
+            print(f"Staging for {self.name} has {staged} rows vs {live} live (< {self.min_ratio:.0%}). Keeping the live collection.")
+            return False
+
+        if live:
+            # $out replaces _prev in one step, so there's always a complete rollback copy
+            self.db[self.name].aggregate([{"$match": {}}, {"$out": f"{self.name}_prev"}])
+        self.staging.rename(self.name, dropTarget=True)
+        print(f"Swapped in {staged} rows for {self.name} (previous generation kept in {self.name}_prev).")
+        return True
+
+    def rollback(self):
+        """Puts the previous generation back."""
+        prev = self.db[f"{self.name}_prev"]
+        if prev.estimated_document_count() == 0:
+            print(f"No previous generation of {self.name} to roll back to.")
+            return False
+        # $out keeps the indexes begin() puts on staging
+        self.begin()
+        prev.aggregate([{"$match": {}}, {"$out": f"{self.name}_staging"}])
+        self.staging.rename(self.name, dropTarget=True)
+        print(f"Rolled {self.name} back to the previous generation.")
+        return True
@@ -0,0 +1,54 @@
+import io
+import pytest
+import schedule_pdf
+from schedule_pdf import _iter_page_texts, _iter_page_texts_parallel, start_page_pool
+
+
+def build_pdf(pages):
+    """A minimal PDF with one Helvetica text line per entry of each page's list."""
+    objects = ["<< /Type /Catalog /Pages 2 0 R >>", None, "<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>"]
+    kids = []
+    for lines in pages:
+        text = " ".join(
+            f"BT /F1 11 Tf 72 {720 - 16 * i} Td ({line}) Tj ET" for i, line in enumerate(lines)
+        )
+        objects.append(f"<< /Length {len(text)} >>\nstream\n{text}\nendstream")
+        objects.append(
+            f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] "
+            f"/Resources << /Font << /F1 3 0 R >> >> /Contents {len(objects)} 0 R >>"
+        )
+        kids.append(f"{len(objects)} 0 R")
+    objects[1] = f"<< /Type /Pages /Kids [{' '.join(kids)}] /Count {len(kids)} >>"
+
+    out = io.BytesIO()
+    out.write(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(out.tell())
+        out.write(f"{number} 0 obj\n{body}\nendobj\n".encode("latin-1"))
+    xref = out.tell()
+    out.write(f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n".encode("latin-1"))
+    for offset in offsets:
+        out.write(f"{offset:010d} 00000 n \n".encode("latin-1"))
+    out.write(f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n".encode("latin-1"))
+    out.seek(0)
+    return out
+
+
+@pytest.fixture
+def page_pool():
+    pool = start_page_pool(2)
+    yield pool
+    pool.shutdown()
+    schedule_pdf._page_pool = None
+
+
+def test_parallel_pages_match_serial(page_pool):
+    # More pages than one task holds, with an empty page and a short last chunk
+    pages = [[f"Page {p} Guard {g} 8:{g:02d} AM" for g in range(p % 4)] for p in range(1, 12)]
+    serial = list(_iter_page_texts(build_pdf(pages)))
+    parallel = list(_iter_page_texts_parallel(build_pdf(pages)))
+
+    assert len(serial) == len(pages) > schedule_pdf.PAGES_PER_TASK
+    assert parallel == serial
+    assert "Page 2 Guard 1 8:01 AM" in serial[1]
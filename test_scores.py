@@ -33,7 +33,8 @@ def inject_round_scores(target_round):
     if updated_count > 0:
         db["live_state"].update_one(
             {"_id": live_state_doc["_id"]},
-            {"$set": {"data": combined_data}}
+            # Bump the version so the Live Hub watcher picks it up; drop the hash so the worker rewrites it
+            {"$set": {"data": combined_data}, "$inc": {"version": 1}, "$unset": {"hash": ""}}
         )
         print(f"\n✅ Successfully published {updated_count} scores to CompetitionSuite (Simulation)!")
     else: